@@ -1,13 +1,30 @@
 from config import *
+import mmap
+import os
+import struct
+from collections import OrderedDict
 import pygame as pg
 import pygame.freetype as freetype
 
+_default_font = None
+
+
+def default_font() -> freetype.Font:
+    """Returns the FONT_PATH font, freetype is only initialised and the font loaded the first time text needs it"""
+    global _default_font
+    if _default_font is None:
+        freetype.init()
+        _default_font = freetype.Font(FONT_PATH, FONT_SIZE)
+    return _default_font
+
+
 class Button():
     """Button with different textures when Idle, Hovered Over, or Pressed.
 
     In order for the button to work as intended, the following must be done in the game loop:
-    - Include the button in `listener_mouse_button` to make sure all mouse button events are handled by the button
-    - Similary, removing the button from `listener_mouse_button` effectively disables the button
+    - Pass all mouse button events to the listeners in `listening_mouse_button`, which includes `button_router`
+    - `.enable()` registers the button with `button_router`, which forwards the events only to the buttons under the mouse
+    - Similary, `.disable()` removes the button from `button_router`
     """
     IDLE = 0
     HOVER = 1
@@ -68,12 +85,12 @@ class Button():
         self.await_release = None   # The button that is currently awaiting release
         self._img_ind = self.IDLE   # The button's image state is based on this
         self.is_enabled = False
+        self.is_dirty = True        # True when the button has to be redrawn
 
     def _on_mouse_button(self, event):
         """Updates button status based on mouse
         
-        Called with just mouse position to check for hovering
-        Can also be called with a MOUSEBUTTONUP or MOUSEBUTTONDOWN event for handling
+        Called with a MOUSEBUTTONUP or MOUSEBUTTONDOWN event for handling
         """
         # We need the mouse's relative position to on_surface to check if it's hovering over the button
         abs_pos = event.pos
@@ -81,45 +98,70 @@ class Button():
 
         # Mouse Button Event while outside button, we just reset
         if not self.rect.collidepoint(rel_pos):
-            self._img_ind = self.IDLE
+            self.set_img_ind(self.IDLE)
             self.await_release = None
             return False
 
         # Hovering over button
         if event.type == pg.MOUSEBUTTONDOWN:
-            self._img_ind = self.PRESSED
+            self.set_img_ind(self.PRESSED)
             self.await_release = event.button
         elif event.type == pg.MOUSEBUTTONUP:
             if self.await_release == event.button:  # Button only triggers if the mouse button has been held
-                self._img_ind = self.IDLE
+                self.set_img_ind(self.HOVER)        # The mouse is still over the button after releasing it
                 if event.button in self.funcs:
                     self.funcs[event.button](self)  # Class the attached Callback function with self
             self.await_release = None
         return True
         
-    def hover_check(self):
-        """Checks if this button is currently being hovered on, then assigned the appropriate img"""
-        abs_pos = pg.mouse.get_pos()
+    def hover_check(self, abs_pos=None):
+        """Checks if this button is currently being hovered on, then assigned the appropriate img
+
+        Polls the mouse position unless `abs_pos` is given, prefer `.set_hover()` when the hovered button is already known
+        """
+        if abs_pos is None:
+            abs_pos = pg.mouse.get_pos()
         rel_pos = (abs_pos[0] - self.on_surface_abs_pos[0], abs_pos[1] - self.on_surface_abs_pos[1])
+        self.set_hover(self.rect.collidepoint(rel_pos))
 
-        if self.rect.collidepoint(rel_pos): # Hovering over button
+    def set_hover(self, is_hovered: bool):
+        """Assigns the appropriate img for whether the mouse is over this button"""
+        if is_hovered:
             if not self.await_release:      # Only goes back to HOVER state if it's not being pressed
-                self._img_ind = self.HOVER
+                self.set_img_ind(self.HOVER)
         else:
-            self._img_ind = self.IDLE
+            self.set_img_ind(self.IDLE)
 
     def draw(self):
         """Blits the button onto it's on_surface
         
-        Always call `check_mouse` before this to make sure the correct button state is drawn
+        The hover state is not polled here, it is kept up to date by MOUSEMOTION events (see `ButtonRouter`)
         """
-        if self.is_enabled:
-            self.hover_check()
+        self.blit()
+
+    def blit(self):
+        """Blits the button's current image onto it's on_surface, and marks it as clean"""
         self.on_surface.blit(self.imgs[self._img_ind], self.rect)
+        self.is_dirty = False
+
+    def mark_dirty(self):
+        """Flags the button to be redrawn on the next dirty-region render"""
+        self.is_dirty = True
+
+    def get_abs_rect(self) -> pg.Rect:
+        """Returns the button's rect relative to the game display instead of `on_surface`"""
+        return self.rect.move(self.on_surface_abs_pos)
+
+    def set_img_ind(self, img_ind: int):
+        """Sets the image state (IDLE, HOVER, PRESSED), marking the button dirty only if it changed"""
+        if img_ind != self._img_ind:
+            self._img_ind = img_ind
+            self.mark_dirty()
 
     def set_imgs(self, imgs):
         self.imgs = self.to_surface_none_list(imgs)  # Get self.imgs containing [Surface/None, Surface/None, Surface/None]
         self.imgs = self.complete_imgs(self.imgs)  # We have self.imgs containing [Surface, Surface, Surface]
+        self.mark_dirty()
 
     def set_funcs(self, funcs):
         if funcs is None:   # If no trigger specified, "Clicked <Button>" function will be assigned
@@ -132,15 +174,20 @@ class Button():
         self.funcs = funcs
 
     def enable(self):
-        """Enable button by removing it from the global listening list & hover detection"""
-        listening_mouse_button.add(self)
+        """Enable button by adding it to the global `button_router` & hover detection"""
+        button_router.add(self)
         self.is_enabled = True
 
     def disable(self):
-        """Disable button by removing it from the global listening list & hover detection"""
-        listening_mouse_button.remove(self)
+        """Disable button by removing it from the global `button_router` & hover detection"""
+        button_router.remove(self)
         self.is_enabled = False
 
+    def release(self):
+        """Resets a pressed button back to idle, without triggering it's callback"""
+        self.set_img_ind(self.IDLE)
+        self.await_release = None
+
     @staticmethod
     def to_surface_none_list(imgs):
         """Returns a List of Surfaces/None (Idle, Hover, Pressed)
@@ -186,16 +233,125 @@ class Button():
         return complete_imgs
 
 
+class RectIndex():
+    """Uniform grid index of objects by their rects, so the objects at a point can be found without checking them all
+
+    Each object is stored in every bucket (a `bucket_size` square of the grid) that its rect overlaps
+    """
+    def __init__(self, bucket_size=64):
+        self.bucket_size = bucket_size
+        self.buckets = {}   # (bucket_x, bucket_y): set of objects overlapping that bucket
+        self.rects = {}     # object: rect it was inserted with
+
+    def _bucket_keys(self, rect: pg.Rect):
+        """Yields the keys of all buckets that `rect` overlaps"""
+        size = self.bucket_size
+        for bucket_x in range(rect.left // size, (rect.right - 1) // size + 1):
+            for bucket_y in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield bucket_x, bucket_y
+
+    def insert(self, obj, rect: pg.Rect):
+        """Adds `obj` occupying `rect`, replacing it's previous rect if it was already inserted"""
+        self.remove(obj)
+        rect = pg.Rect(rect)
+        self.rects[obj] = rect
+        for key in self._bucket_keys(rect):
+            self.buckets.setdefault(key, set()).add(obj)
+
+    def remove(self, obj):
+        """Removes `obj` from the index, does nothing if it isn't in it"""
+        rect = self.rects.pop(obj, None)
+        if rect is None:
+            return
+        for key in self._bucket_keys(rect):
+            bucket = self.buckets[key]
+            bucket.discard(obj)
+            if not bucket:
+                del self.buckets[key]
+
+    def query(self, pos: tuple[int, int]) -> list:
+        """Returns the objects whose rect contains `pos`"""
+        bucket = self.buckets.get((pos[0] // self.bucket_size, pos[1] // self.bucket_size), ())
+        return [obj for obj in bucket if self.rects[obj].collidepoint(pos)]
+
+    def __contains__(self, obj):
+        return obj in self.rects
+
+
+class ButtonRouter():
+    """Listener in `listening_mouse_button` that forwards mouse button events only to the enabled `Button`s under the mouse
+
+    Buttons that were pressed and no longer under the mouse are released, like when every button received the event
+    MOUSEMOTION events update the hover state of only the buttons the mouse left or entered
+    """
+    def __init__(self):
+        self.index = RectIndex()
+        self.pressed = set()    # Buttons awaiting the release of a mouse button
+        self.hovered = set()    # Buttons under the mouse
+
+    def add(self, button: Button):
+        self.index.insert(button, button.get_abs_rect())
+        button.hover_check()    # The mouse might already be over the button
+        self.hovered.add(button)
+
+    def remove(self, button: Button):
+        self.index.remove(button)
+        self.pressed.discard(button)
+        self.hovered.discard(button)
+
+    def _on_mouse_motion(self, event):
+        hits = self.index.query(event.pos)
+        for button in self.hovered.difference(hits):
+            button.set_hover(False)
+        for button in hits:
+            button.set_hover(True)
+        self.hovered = set(hits)
+
+    def _on_mouse_button(self, event):
+        hits = self.index.query(event.pos)
+        for button in self.pressed.difference(hits):
+            button.release()
+        self.pressed.intersection_update(hits)
+
+        for button in hits:
+            if button not in self.index:    # Disabled by the callback of an earlier button
+                continue
+            button._on_mouse_button(event)
+            if button.await_release is not None and button in self.index:
+                self.pressed.add(button)
+            else:
+                self.pressed.discard(button)
+
+button_router = ButtonRouter()
+listening_mouse_button.add(button_router)
+
+
 class CellButtonStyle():
-    """Needs to be provided to `CellButton` to stylize the Buttons
+    """Needs to be provided to `minesweeper.Minefield` to stylize the squares
+
+    Every state's (Idle, Hover, Pressed) images are completed once and packed into a single atlas Surface,
+    so squares only refer to their state by an integer index, without loading or allocating anything when it changes:
+        board.blit(style.atlas, rect, style.areas[state][img_ind])
+
+    States 0 to 8 are the exposed numbers, followed by `NORMAL`, `FLAG`, `MINE` and `FLAG_WRONG`
 
     Attributes:
+        atlas (pg.Surface): Every image, a row per state with the Idle, Hover and Pressed images side by side
+        areas ([[pg.Rect, pg.Rect, pg.Rect], ...]): areas[state][img_ind] is the area of that image in `atlas`
+        imgs ([[pg.Surface, pg.Surface, pg.Surface], ...]): imgs[state] is the (Idle, Hover, Pressed) subsurfaces of `atlas`
+        cellsize (int): The size of the images in `atlas`, see `.scaled()` for other sizes
         normal_button_imgs ([pg.Surface, pg.Surface, pg.Surface]): The list of [Idle, Hover, Pressed] Surfaces for the Normal Button
         flag_button_imgs ([pg.Surface, pg.Surface, pg.Surface]): The list of [Idle, Hover, Pressed] Surfaces for the Flagged Button
         mine_button_imgs ([pg.Surface, pg.Surface, pg.Surface]): The list of [Idle, Hover, Pressed] Surfaces for the Mine Reveal Button
-        num_buttons_imgs ([(pg.Surface 0, pg.Surface 0), (pg.Surface 1, pg.Surface 1), ...]): num_buttons_imgs[i] = (Idle Surface for i, Hover Surface for i), (i = 0 to 8)
+        flag_wrong_button_imgs ([pg.Surface, pg.Surface, pg.Surface]): The list of [Idle, Hover, Pressed] Surfaces for a misplaced flag
+        num_buttons_imgs ([[pg.Surface 0, ...], [pg.Surface 1, ...], ...]): num_buttons_imgs[i] = [Idle, Hover, Pressed] Surfaces for i, (i = 0 to 8)
     """
-    def __init__(self, normal_button_imgs, flag_img, mine_img, num_imgs_dir):
+    NORMAL = 9
+    FLAG = 10
+    MINE = 11
+    FLAG_WRONG = 12
+
+    def __init__(self, normal_button_imgs, flag_img, mine_img, num_imgs_dir, flag_wrong_img=None):
         """
         CellButtonStyle objects have attributes that aids in creating the various Buttons
         
@@ -203,7 +359,9 @@ class CellButtonStyle():
             normal_button_imgs (List[pg.Surface] | List[str] | pg.Surface | str): (Idle, Hover, Pressed) Surfaces/Paths, can contain `None`
             flag_img (str | Pygame.Surface):  The Flag Img that will be overlayed on top of the button
             mine_img (str | Pygame.Surface):  The Mine Img that will be overlayed on top of the button
-            num_imgs_dir (str): (eg. "assets/cell/"), the directory to find the files 0.png, 1.png, ...
+            num_imgs_dir (str): (eg. "assets/cell/"), the directory to find the files 0.png, 1.png, ... and the hovered 1_B.png, 2_B.png, ...
+            flag_wrong_img (str | Pygame.Surface): The Wrong Flag Img overlayed on top of the flagged button for a misplaced flag at the end of the game,
+                defaults to flag_wrong.png in `num_imgs_dir`
         """
         # Create the (Idle, Hover, Pressed) Surfaces for Normal Buttons
         normal_button_imgs = Button.to_surface_none_list(normal_button_imgs)
@@ -220,40 +378,225 @@ class CellButtonStyle():
         assert isinstance(mine_img, pg.Surface)
         mine_button_imgs = (mine_img, mine_img, mine_img)
 
-        # Create the (Idle, Hover, Pressed) Surfaces for Flag Buttons
+        if flag_wrong_img is None:
+            flag_wrong_img = num_imgs_dir + "flag_wrong.png"
+        if isinstance(flag_wrong_img, str):
+            flag_wrong_img = pg.image.load(flag_wrong_img)
+        flag_wrong_img = flag_wrong_img.convert_alpha()
+        assert isinstance(flag_wrong_img, pg.Surface)
+
+        # Create the (Idle, Hover, Pressed) Surfaces for Flag and Wrong Flag Buttons
         flag_button_imgs = [None, None, None]
+        flag_wrong_button_imgs = [None, None, None]
         for i, normal_img in enumerate(normal_button_imgs):
             flag_button_imgs[i] = normal_img.copy() # Flag Button Imgs are generated by overlaying the flag over Normal Imgs
             flag_button_imgs[i].blit(flag_img, (0,0))
+            flag_wrong_button_imgs[i] = flag_button_imgs[i].copy()    # Tints the flag
+            flag_wrong_button_imgs[i].blit(flag_wrong_img, (0,0))
         # Now flag_imgs = [Surface, Surface, Surface]
 
-        # Numbers will be images stored as 0.png, 1.png, ... in num_imgs_dir (eg. assets/cell/)
-        num_imgs = [pg.image.load(num_imgs_dir + f"{i}.png").convert_alpha() for i in range(9)]
-        # Now nums_imgs = [Surface for 0, Surface for 1, ...]
-        num_buttons_imgs = [(img, img) for img in num_imgs]
+        # Numbers will be images stored as 0.png, 1.png, ... in num_imgs_dir (eg. assets/cell/), hovered as 1_B.png, 2_B.png, ...
+        num_buttons_imgs = []
+        for i in range(9):
+            hover_path = num_imgs_dir + f"{i}_B.png"
+            num_buttons_imgs.append(Button.complete_imgs(Button.to_surface_none_list(
+                (num_imgs_dir + f"{i}.png", hover_path if os.path.exists(hover_path) else None))))
+        # Now num_buttons_imgs = [[Surfaces for 0], [Surfaces for 1], ...]
+
+        # Pack every state into the atlas, in the order of the state indices
+        states = num_buttons_imgs + [normal_button_imgs, flag_button_imgs, mine_button_imgs, flag_wrong_button_imgs]
+        width = max(img.get_width() for imgs in states for img in imgs)
+        height = max(img.get_height() for imgs in states for img in imgs)
+        atlas = pg.Surface((width*3, height*len(states)), pg.SRCALPHA).convert_alpha()
+        all_areas = []
+        for state, imgs in enumerate(states):
+            areas = []
+            for img_ind, img in enumerate(imgs):
+                area = img.get_rect(topleft=(width*img_ind, height*state))
+                atlas.blit(img, area)
+                areas.append(area)
+            all_areas.append(areas)
+        self._set_atlas(atlas, all_areas)
+
+    def _set_atlas(self, atlas: pg.Surface, areas: list[list[pg.Rect]]) -> None:
+        """Sets the atlas of the style and the attributes viewing it"""
+        self.atlas = atlas
+        self.areas = areas
+        self.imgs = [[self.atlas.subsurface(area) for area in areas] for areas in self.areas]
+        self.cellsize = max(area.w for areas in self.areas for area in areas)
+        self._scaled = {self.cellsize: (self.atlas, self.areas)}   # Cell size: (atlas, areas), built on demand by `.scaled()`
+
+        self.normal_button_imgs = self.imgs[self.NORMAL]
+        self.flag_button_imgs = self.imgs[self.FLAG]
+        self.mine_button_imgs = self.imgs[self.MINE]
+        self.flag_wrong_button_imgs = self.imgs[self.FLAG_WRONG]
+        self.num_buttons_imgs = self.imgs[:9]
+
+    @classmethod
+    def from_dir(cls, directory: str, bundle_path: str | None = None) -> "CellButtonStyle":
+        """Creates the style from idle.png, hover.png, flag.png, mine.png and the numbers in `directory` (eg. "assets/cell/")
+
+        If `bundle_path` is a bundle newer than every image of `directory` (see `.save_bundle()`), it is loaded instead
+        """
+        if bundle_path is not None and os.path.exists(bundle_path):
+            if os.path.getmtime(bundle_path) >= max(entry.stat().st_mtime for entry in os.scandir(directory)):
+                try:
+                    return cls.load_bundle(bundle_path)
+                except ValueError as error:
+                    print(f"Could not load {bundle_path}: {error}")
+        return cls((directory + "idle.png", directory + "hover.png"), directory + "flag.png", directory + "mine.png", directory)
+
+    # Pre-baked bundle: BUNDLE_HEADER (magic, version, atlas width, atlas height, number of states), the area (x, y, w, h) of
+    # every image, then the atlas as raw RGBA pixels, which are used straight from the memory-mapped file instead of decoding PNGs
+    BUNDLE_MAGIC = b"MSCB"
+    BUNDLE_VERSION = 1
+    BUNDLE_HEADER = struct.Struct("<4sBHHB")
+    BUNDLE_AREA = struct.Struct("<HHHH")
+
+    def save_bundle(self, path: str) -> None:
+        """Saves the atlas as a bundle that `.load_bundle()` loads without decoding any image"""
+        with open(path, "wb") as file:
+            file.write(self.BUNDLE_HEADER.pack(self.BUNDLE_MAGIC, self.BUNDLE_VERSION, *self.atlas.get_size(), len(self.areas)))
+            for areas in self.areas:
+                for area in areas:
+                    file.write(self.BUNDLE_AREA.pack(*area))
+            file.write(pg.image.tostring(self.atlas, "RGBA"))  # tobytes() only exists from pygame 2.1.3
+
+    @classmethod
+    def load_bundle(cls, path: str) -> "CellButtonStyle":
+        """Creates the style from a bundle saved by `.save_bundle()`
+
+        Raises:
+            ValueError: If `path` is not a bundle of this version
+        """
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            try:
+                magic, version, width, height, no_states = cls.BUNDLE_HEADER.unpack_from(data)
+            except struct.error:
+                raise ValueError("Truncated cell bundle") from None
+            if magic != cls.BUNDLE_MAGIC or version != cls.BUNDLE_VERSION:
+                raise ValueError("Not a cell bundle of this version")
+            pos = cls.BUNDLE_HEADER.size
+            areas = []
+            for _ in range(no_states):
+                areas.append([pg.Rect(cls.BUNDLE_AREA.unpack_from(data, pos + i*cls.BUNDLE_AREA.size)) for i in range(3)])
+                pos += 3*cls.BUNDLE_AREA.size
+            if len(data) != pos + width*height*4:
+                raise ValueError("Truncated cell bundle")
+            pixels = memoryview(data)[pos:]
+            source = pg.image.frombuffer(pixels, (width, height), "RGBA")
+            atlas = source.convert_alpha()  # The only copy of the pixels, in the display's format
+            del source  # Releases the mapped file
+            pixels.release()
+        style = cls.__new__(cls)
+        style._set_atlas(atlas, areas)
+        return style
+
+    def scaled(self, cellsize: int) -> tuple[pg.Surface, list[list[pg.Rect]]]:
+        """Returns the (atlas, areas) of every image scaled to `cellsize` x `cellsize`, eg. for a zoomed minefield
+
+        Each size is only scaled once, image by image so that neighbouring images don't bleed into each other
+        """
+        if cellsize not in self._scaled:
+            atlas = pg.Surface((cellsize*3, cellsize*len(self.imgs)), pg.SRCALPHA).convert_alpha()
+            areas = []
+            for state, imgs in enumerate(self.imgs):
+                areas.append([])
+                for img_ind, img in enumerate(imgs):
+                    area = pg.Rect(cellsize*img_ind, cellsize*state, cellsize, cellsize)
+                    atlas.blit(pg.transform.smoothscale(img, area.size), area)
+                    areas[-1].append(area)
+            self._scaled[cellsize] = (atlas, areas)
+        return self._scaled[cellsize]
+
+class TextCache():
+    """Least recently used cache of rendered text, so the same text is only rendered once
+
+    Works with both `pg.font.Font` and `freetype.Font` fonts, keyed by (text, font, size, color)
+
+    Attributes:
+        maxsize (int): Rendered texts kept, the least recently used is dropped first
+        hits, misses (int): Number of renders served from the cache, and rendered
+    """
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.renders = OrderedDict()    # Key: (surface, rect)
+        self.hits = self.misses = 0
+
+    def render(self, font: pg.font.Font | freetype.Font, text: str, color, size=0) -> tuple[pg.Surface, pg.Rect]:
+        """Returns the (surface, rect) of `text`, like `freetype.Font.render()` (`size` is ignored by `pg.font.Font`)
+
+        The surface is shared with the cache and must not be drawn on, the rect is a copy that can be moved
+        """
+        key = (text, font, size, tuple(color))
+        if key in self.renders:
+            self.renders.move_to_end(key)
+            self.hits += 1
+        else:
+            if isinstance(font, freetype.Font):
+                surface, rect = font.render(text, fgcolor=color, size=size)
+            else:
+                surface = font.render(text, True, color)
+                rect = surface.get_rect()
+            self.renders[key] = (surface, rect)
+            if len(self.renders) > self.maxsize:
+                self.renders.popitem(last=False)
+            self.misses += 1
+        surface, rect = self.renders[key]
+        return surface, rect.copy()
+
+text_cache = TextCache()
+
+class DigitStrip():
+    """Counters (eg. the timer) drawn by blitting pre-rendered glyphs, instead of rendering the text of every new value
 
-        self.normal_button_imgs = normal_button_imgs
-        self.flag_button_imgs = flag_button_imgs
-        self.mine_button_imgs = mine_button_imgs
-        self.num_buttons_imgs = num_buttons_imgs
+    Attributes:
+        strip (pg.Surface): Every glyph of `chars` side by side
+        areas (dict[str, pg.Rect]): Character: the area of its glyph in `strip`
+    """
+    def __init__(self, font: pg.font.Font | freetype.Font, color, chars="0123456789-", size=0):
+        glyphs = [text_cache.render(font, char, color, size)[0] for char in chars]
+        height = max(glyph.get_height() for glyph in glyphs)
+        self.strip = pg.Surface((sum(glyph.get_width() for glyph in glyphs), height), pg.SRCALPHA)
+        self.areas = {}
+        x = 0
+        for char, glyph in zip(chars, glyphs):
+            self.areas[char] = self.strip.blit(glyph, (x, height - glyph.get_height()))    # Glyphs share their bottom edge
+            x += glyph.get_width()
+
+    def size(self, text: str) -> tuple[int, int]:
+        """Returns the size `text` (made of the strip's characters) is drawn at"""
+        return sum(self.areas[char].w for char in text), self.strip.get_height()
+
+    def blits(self, text: str, topleft: tuple[int, int]) -> list[tuple[pg.Surface, tuple[int, int], pg.Rect]]:
+        """Returns the (source, dest, area) of every glyph of `text` drawn at `topleft`, to be drawn with `pg.Surface.blits()`"""
+        x, y = topleft
+        blits = []
+        for char in text:
+            area = self.areas[char]
+            blits.append((self.strip, (x, y + area.y), area))
+            x += area.w
+        return blits
 
 # WIP
 class Text():
-    def __init__(self, text: str, size=0, color=COLOR_DARK2, offset=0, font=FONT):
+    def __init__(self, text: str, size=0, color=COLOR_DARK2, offset=0, font=None):
         """ Creates multi-line text with a consistent leading height from one baseline to another.
         
-        Line breaks have to be explicitly provided in `text`.
+        Line breaks have to be explicitly provided in `text`. `font` defaults to `default_font()`
         
         Attributes:
             surface (pg.Surface): The surface with the Multi-Line Text rendered
             rect (pg.Rect): The bounding rectangle of `surface`
         """
+        if font is None:
+            font = default_font()
         renders = []
         height = font.get_sized_height(size)
         leading = height + offset
 
         for line in text.split("\n"):
-            renders.append(font.render(line, fgcolor=color, size=size))
+            renders.append(text_cache.render(font, line, color, size))    # Lines already rendered (eg. by a previous pop-up) are reused
         
         current_baseline = leading
         # for surface, rect in renders:
@@ -316,6 +659,7 @@ class PopUp():
         self.buttons = []
 
         self.is_hidden = True
+        self.is_dirty = True    # True when the pop-up has to be redrawn
 
     def set_border(self, color: pg.Color):
         self.border.fill(color)
@@ -337,6 +681,7 @@ class PopUp():
         
         self.text_surf = text.surface
         self.text_rect = text_rect
+        self.is_dirty = True
 
     def add_button(self, imgs, funcs=None, bounding_margins=(0, 0, 0, 0)):
         """Adds a button centred in the bounding rectange, which by default is the entire pop-up.
@@ -364,14 +709,29 @@ class PopUp():
         for button in self.buttons:
             button.enable()
         self.is_hidden = False
+        self.is_dirty = True
         
     def draw(self):
         """Draws Popup if not hidden"""
         if self.is_hidden:
             return
+        for button in self.buttons:
+            button.draw()   # Buttons are drawn onto the background first, so they are not covered by it
         self.on_surface.blit(self.border, self.border_rect)
         self.on_surface.blit(self.background, self.rect)
         self.on_surface.blit(self.text_surf, self.text_rect)
-        for button in self.buttons:
-            button.draw()
+        self.is_dirty = False
+
+    def draw_dirty(self) -> list[pg.Rect]:
+        """Draws Popup only if it or one of its buttons changed since the last draw
+
+        Returns:
+            List of the redrawn areas on `on_surface` (empty if nothing was drawn)
+        """
+        if self.is_hidden:
+            return []
+        if not self.is_dirty and not any(button.is_dirty for button in self.buttons):
+            return []
+        self.draw()
+        return [self.border_rect.copy()]
 
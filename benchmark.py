@@ -0,0 +1,218 @@
+"""Benchmarks of the generation, reveal, chord, win check and render hot paths
+
+Runs headless (SDL_VIDEODRIVER=dummy), sweeping board sizes and mine densities:
+    python benchmark.py --out before.json
+    python benchmark.py --sizes 16x16,100x100 --densities 0.15 --out after.json
+Compare two runs, exiting with 1 if any benchmark's ops/sec dropped by more than the threshold:
+    python benchmark.py --compare before.json after.json --threshold 0.1
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.chdir(os.path.dirname(os.path.abspath(__file__)))    # config loads the fonts relative to the project
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import pygame as pg
+import engine
+
+DEFAULT_SIZES = "9x9,16x16,16x30,50x50,100x100"
+DEFAULT_DENSITIES = "0.12,0.2"
+
+
+def percentile(sorted_values: list, fraction: float):
+    """Returns the value at `fraction` (0 to 1) of the already sorted `sorted_values`"""
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def measure(op, setup=None, repeat=200, min_time=0.2) -> dict:
+    """Times `op()` at least `repeat` times (and for at least `min_time` seconds), running the untimed `setup()` before each
+
+    Returns the ops/sec, p50/p99 latency and peak traced memory of a single call of `op`
+    """
+    durations = []
+    started = time.perf_counter()
+    while len(durations) < repeat or time.perf_counter() - started < min_time:
+        if setup is not None:
+            setup()
+        start = time.perf_counter_ns()
+        op()
+        durations.append(time.perf_counter_ns() - start)
+        if len(durations) >= 100 * repeat:
+            break
+
+    # Peak memory is measured on a separate call, as tracing slows everything down
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    op()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    durations.sort()
+    return {
+        "ops_per_sec": len(durations) / (sum(durations) / 1e9),
+        "p50_us": percentile(durations, 0.5) / 1000,
+        "p99_us": percentile(durations, 0.99) / 1000,
+        "peak_kib": peak / 1024,
+        "runs": len(durations),
+    }
+
+
+def packed_int_matrix(rows: int, cols: int, bombs: int) -> list[list[int]]:
+    """Returns the int matrix of a board with its `bombs` mines in its last cells, the other cells being one opening"""
+    int_matrix = [[0]*cols for _ in range(rows)]
+    for index in range(rows*cols - bombs, rows*cols):
+        row, col = divmod(index, cols)
+        int_matrix[row][col] = -1
+        for r in range(max(row-1, 0), min(row+2, rows)):
+            for c in range(max(col-1, 0), min(col+2, cols)):
+                if int_matrix[r][c] >= 0:
+                    int_matrix[r][c] += 1
+    return int_matrix
+
+
+def bench_board(rows: int, cols: int, density: float, cellstyle, repeat: int) -> dict:
+    """Runs every benchmark on one board size and density, returning {benchmark name: measurement}"""
+    import minesweeper
+    bombs = min(max(int(rows * cols * density), 1), rows * cols - 9)
+    start = (rows // 2, cols // 2)
+    tag = f"{rows}x{cols}/d{density:g}"
+    results = {}
+    seeds = iter(range(1 << 62))
+
+    backends = ["python"] + ([] if engine.np is None else ["numpy"])
+    for backend in backends:
+        results[f"generate[{backend}]/{tag}"] = measure(
+            lambda: engine.generate_int_matrix(rows, cols, bombs, start, 0, next(seeds), backend), repeat=repeat)
+
+    minefield = minesweeper.Minefield((0, 0), cellstyle, 0, seed=12345, rows=rows, cols=cols, bombs=bombs)
+
+    def started():
+        """Resets to a started (but unexposed) board"""
+        pg.event.clear()
+        minefield.reset_board()
+        minefield.start_game(start)
+
+    started()
+    results[f"metrics/{tag}"] = measure(lambda: engine.board_metrics(minefield.values, rows, cols), repeat=repeat)
+    results[f"expose/{tag}"] = measure(lambda: minefield.cell(start).expose(), started, repeat)
+    start_index = start[0]*cols + start[1]
+    results[f"click/{tag}"] = measure(lambda: minefield.click(start_index, 1), started, repeat)
+
+    # The largest opening: every mine packed in the last cells, so the first click floods the rest of the board
+    opening = engine.Board(rows, cols, bombs, 0)
+    opening_matrix = packed_int_matrix(rows, cols, bombs)
+
+    def unexposed():
+        opening.reset_board()
+        opening.load_int_matrix(opening_matrix)
+    results[f"expose_opening/{tag}"] = measure(lambda: opening.expose((0, 0)), unexposed, max(repeat // 10, 5))
+
+    # Chord a numbered cell next to the opening, with all the mines around it flagged
+    started()
+    minefield.cell(start).expose()
+    chord_coord = None
+    for index in range(rows * cols):
+        if minefield.exposed[index] and minefield.values[index] > 0:
+            chord_coord = divmod(index, cols)
+            break
+    if chord_coord is not None:
+        mines = [coord for coord in minefield.neighbours(chord_coord) if minefield.cell(coord).is_mine]
+
+        def flagged():
+            started()
+            minefield.cell(start).expose()
+            for coord in mines:
+                minefield.cell(coord).flag()
+        results[f"chord/{tag}"] = measure(lambda: minefield.cell(chord_coord).attempt_expose_around(), flagged, repeat)
+
+    started()
+    results[f"check_win/{tag}"] = measure(minefield.check_win, repeat=repeat)
+    results[f"draw_board/{tag}"] = measure(minefield.draw_board, repeat=max(repeat // 10, 5))
+
+    def exposed_dirty():
+        started()
+        minefield.cell(start).expose()
+    results[f"draw_dirty/{tag}"] = measure(minefield.draw_dirty, exposed_dirty, repeat)
+    results[f"reset_board/{tag}"] = measure(minefield.reset_board, started, repeat)
+    pg.event.clear()
+    return results
+
+
+def run(sizes: list[tuple[int, int]], densities: list[float], repeat: int) -> dict:
+    import UI
+    pg.init()
+    pg.display.set_mode((960, 540))
+    cellstyle = UI.CellButtonStyle(("assets/cell/idle.png", "assets/cell/hover.png"), "assets/cell/flag.png", "assets/cell/mine.png", "assets/cell/")
+
+    results = {}
+    for rows, cols in sizes:
+        for density in densities:
+            board_results = bench_board(rows, cols, density, cellstyle, repeat)
+            for name, result in board_results.items():
+                print(f"{name:40} {result['ops_per_sec']:>12.1f} ops/s  p50 {result['p50_us']:>10.1f} us  "
+                      f"p99 {result['p99_us']:>10.1f} us  peak {result['peak_kib']:>9.1f} KiB")
+            results.update(board_results)
+    pg.quit()
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pg.version.ver,
+            "numpy": None if engine.np is None else engine.np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(old: dict, new: dict, threshold: float) -> list[str]:
+    """Prints the change in ops/sec of every benchmark in both runs, returning the names that regressed by more than `threshold`"""
+    regressions = []
+    for name, old_result in old["results"].items():
+        new_result = new["results"].get(name)
+        if new_result is None:
+            continue
+        change = new_result["ops_per_sec"] / old_result["ops_per_sec"] - 1
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:40} {old_result['ops_per_sec']:>12.1f} -> {new_result['ops_per_sec']:>12.1f} ops/s  {change:>+8.1%}{flag}")
+    return regressions
+
+
+def parse_sizes(text: str) -> list[tuple[int, int]]:
+    return [tuple(int(n) for n in size.split("x")) for size in text.split(",")]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma separated ROWSxCOLS (default {DEFAULT_SIZES})")
+    parser.add_argument("--densities", default=DEFAULT_DENSITIES, help=f"comma separated mine densities (default {DEFAULT_DENSITIES})")
+    parser.add_argument("--repeat", type=int, default=50, help="minimum timed runs of each benchmark")
+    parser.add_argument("--out", help="save the results as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two saved results instead of running")
+    parser.add_argument("--threshold", type=float, default=0.1, help="ops/sec drop flagged as a regression (default 0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as old_file, open(args.compare[1]) as new_file:
+            regressions = compare(json.load(old_file), json.load(new_file), args.threshold)
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1 if regressions else 0
+
+    results = run(parse_sizes(args.sizes), [float(d) for d in args.densities.split(",")], args.repeat)
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
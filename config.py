@@ -1,15 +1,35 @@
+import os
 import pygame as pg
-import pygame.freetype as freetype
-freetype.init()
 
 # Game Configurations
+PRESET = None   # "beginner", "intermediate", "expert" (see engine.PRESETS), or None for a custom board of ROWS x COLS with BOMBS
 ROWS, COLS = 16, 16
 BOMBS = 50
 
 CELLSIZE = 25
 GAP = 3
+VIEWPORT = (520, 460)   # Largest (width, height) the board takes on screen, bigger boards are panned with the arrow keys or a middle mouse drag
+ZOOM_CELLSIZES = (5, 8, 12, 18, 25, 35, 50)    # Cell sizes the mouse wheel zooms between, GAP is scaled along
+PAN_SPEED = 12  # Pixels per frame the arrow keys pan by
 
-GAMEMODE = 0
+GAMEMODE = 0    # 0 - 1st cell is a "0", 1 - 1st cell is not a mine, 2 - 1st cell is a "0" and no guessing is needed
+NO_GUESS_BUDGET = 1.0   # Seconds the 1st click of a GAMEMODE 2 game may spend searching a no-guess board
+SEED = None     # Seed every game is generated from, None for a new random board each game
+
+RECORDING_PATH = "recording.msrl"  # Every game of a session is recorded to this file when the window is closed (None to disable)
+AUTOSAVE_PATH = "autosave.mssv"    # The game in progress is saved here every AUTOSAVE_INTERVAL ms and restored at startup (None to disable)
+AUTOSAVE_INTERVAL = 5000
+REPLAY_PATH = None  # Recording to play back at the speed it was played instead of playing (see replay.py)
+
+AUTOPLAY_DELAY = 150  # Milliseconds between the moves of auto-play (A key), H plays a single hint
+
+DEBUG = False   # Runs (slow) consistency checks, eg. the Minefield's counters against a full scan
+
+# Rendering
+FPS = 60                # Frame rate cap of the game loop
+DIRTY_RENDERING = True  # Only redraw and update the parts of the screen that changed
+PROFILE = os.environ.get("MINESWEEPER_PROFILE") == "1"  # Starts with the frame profiler overlay on (toggled with F3, see profiler.py)
+PROFILE_PATH = "profile.json"   # F4 exports the profile here, as a Chrome trace (.json) or CSV (.csv)
 
 # Constants
 COLOR_DARK = pg.Color("#292831")
@@ -17,12 +37,13 @@ COLOR_DARK2 = pg.Color("#333f58")
 COLOR_LIGHT = pg.Color("#fbbbad")
 COLOR_LIGHT2 = pg.Color("#ee8695")
 
-FONT_PATH = "assets/fonts/AdventPro-Regular.ttf"
+FONT_PATH = "assets/fonts/AdventPro-Regular.ttf"   # Default font of UI.Text, loaded on first use (see UI.default_font())
 FONT_SIZE = 20
-FONT = freetype.Font("assets/fonts/AdventPro-Regular.ttf", 20)
+CELL_IMGS_DIR = "assets/cell/"
+CELL_BUNDLE_PATH = "assets/cell.bundle"  # Pre-baked cell images loaded instead of the PNGs if it's up to date (see bake_assets.py)
 
 GAMESTART = pg.event.custom_type()
 GAMEEND = pg.event.custom_type()
 
 # Event Listeners
-listening_mouse_button = set()  # Listener ._on_mouse_button()
\ No newline at end of file
+listening_mouse_button = set()  # Listener ._on_mouse_button(), eg. UI.button_router and the Minefield
\ No newline at end of file
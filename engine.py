@@ -0,0 +1,875 @@
+"""Headless Minesweeper engine - the board, reveal, chord, flag and win/loss logic with no pygame or display dependency
+
+`minesweeper.Minefield` is the pygame adapter built on top of `Board`, but a `Board` can be played on its own:
+
+    board = Board(16, 16, 40)
+    board.start_game((0, 0))
+    board.expose((0, 0))
+    board.flag((3, 4))
+    board.chord((1, 1))
+    if board.is_over: print("Won" if board.won else "Lost")
+"""
+import random
+import re
+import threading
+from array import array
+from collections import deque
+from functools import lru_cache
+from itertools import chain
+try:
+    import numpy as np
+except ImportError:     # NumPy is optional, minefields are generated in pure Python without it
+    np = None
+
+FILL_CELLS = 4096    # Cells an opening exposes one at a time before the rest of it is filled a run of a row at a time
+NEIGHBOUR_TABLE_MAX = 1 << 16   # Boards up to this many cells keep the neighbours of every cell they visit (see `neighbour_table()`)
+MASK64 = (1 << 64) - 1
+MINE_BYTES = bytes(int(byte == 0xFF) for byte in range(256))    # Translates the bytes of values into mines (-1 is 0xFF)
+ZERO_BYTES = bytes(int(byte == 0) for byte in range(256))
+NUMBER_BYTES = bytes(int(1 <= byte <= 8) for byte in range(256))
+RUN = re.compile(b"\x01+")   # A run of 1s in a row of a bitmap with a byte per cell
+GAP = re.compile(b"\x00+")   # A run of 0s
+
+# Difficulty presets - name: (rows, cols, bombs)
+PRESETS = {
+    "beginner": (9, 9, 10),
+    "intermediate": (16, 16, 40),
+    "expert": (16, 30, 99),
+}
+
+
+def board_size(preset: str | None = None, rows: int | None = None, cols: int | None = None, bombs: int | None = None,
+               mode: int | None = None) -> tuple[int, int, int]:
+    """Returns the (rows, cols, bombs) of a preset, or of a "custom" board from `rows`, `cols`, `bombs`
+
+    Given `rows`/`cols`/`bombs` override the preset's. Raises ValueError for unknown presets and impossible sizes,
+    including too many bombs to keep the cells `mode` frees around the first click (see `blocked_indices()`) if `mode` is given
+    """
+    if preset is not None and preset != "custom":
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown preset {preset!r}, expected one of {', '.join(PRESETS)} or custom")
+        preset_rows, preset_cols, preset_bombs = PRESETS[preset]
+        rows = preset_rows if rows is None else rows
+        cols = preset_cols if cols is None else cols
+        bombs = preset_bombs if bombs is None else bombs
+    if rows is None or cols is None or bombs is None:
+        raise ValueError("A custom board needs rows, cols and bombs")
+    if rows < 1 or cols < 1:
+        raise ValueError(f"Board must be at least 1x1, got {rows}x{cols}")
+    if not 0 <= bombs < rows*cols:
+        raise ValueError(f"A {rows}x{cols} board needs between 0 and {rows*cols - 1} bombs, got {bombs}")
+    if mode is not None:
+        most = rows*cols - max(blocked_sizes(rows, cols, mode))    # The first click can free up to 9 cells
+        if bombs > most:
+            raise ValueError(f"A {rows}x{cols} board in mode {mode} needs between 0 and {most} bombs, got {bombs}")
+    return rows, cols, bombs
+
+
+class SplitMix64():
+    """Small, fast PRNG stream (SplitMix64) whose output only depends on the seed
+
+    Unlike `random.Random`, the numbers drawn are the same on every machine and Python version,
+    and the stream is simple enough to be run for many seeds at once with NumPy (see `generate_int_matrices()`)
+    """
+    __slots__ = ("state",)
+
+    def __init__(self, seed: int):
+        self.state = seed & MASK64
+
+    def next(self) -> int:
+        """Returns the next 64-bit number of the stream"""
+        self.state = z = (self.state + 0x9E3779B97F4A7C15) & MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        return z ^ (z >> 31)
+
+    def randbelow(self, n: int) -> int:
+        """Returns a number in range(n) (n < 2**32), by scaling the top 32 bits of the next number"""
+        return ((self.next() >> 32) * n) >> 32
+
+    def sample(self, population, k: int) -> list:
+        """Returns `k` distinct items of `population`, like `random.Random.sample()`
+
+        A partial Fisher-Yates shuffle that only remembers the swapped positions, so it is O(k) whatever the population size
+        """
+        n = len(population)
+        if k > n:
+            raise ValueError("Sample larger than population")
+        swapped = {}
+        result = []
+        for i in range(k):
+            j = i + self.randbelow(n - i)
+            picked = swapped.get(j, j)
+            swapped[j] = swapped.get(i, i)
+            result.append(population[picked])
+        return result
+
+
+def new_seed() -> int:
+    """Returns a random 64-bit seed for a new board"""
+    return random.getrandbits(64)
+
+
+def make_board_id(rows: int, cols: int, bombs: int, mode: int, start_coord: tuple[int, int], seed: int) -> str:
+    """Returns the board ID that rebuilds the same board anywhere, eg. "16x16-40-m0-3,7-00000000075bcd15" """
+    return f"{rows}x{cols}-{bombs}-m{mode}-{start_coord[0]},{start_coord[1]}-{seed:016x}"
+
+
+def parse_board_id(board_id: str) -> dict:
+    """Returns the rows, cols, bombs, mode, start_coord and seed of a board ID made by `make_board_id()`"""
+    try:
+        size, bombs, mode, start, seed = board_id.strip().split("-")
+        rows, cols = size.split("x")
+        start_row, start_col = start.split(",")
+        if not mode.startswith("m"):
+            raise ValueError
+        return {"rows": int(rows), "cols": int(cols), "bombs": int(bombs), "mode": int(mode[1:]),
+                "start_coord": (int(start_row), int(start_col)), "seed": int(seed, 16)}
+    except ValueError:
+        raise ValueError(f"Invalid board ID {board_id!r}") from None
+
+
+def blocked_indices(rows: int, cols: int, start_coord: tuple[int, int], mode: int) -> list[int]:
+    """Returns the flat indices (row*cols + col) of the cells that can't be mines, in increasing order
+
+    mode 0 (and 2) keeps the 3x3 around `start_coord` free (1st cell is a "0"), mode 1 only keeps `start_coord` free
+    """
+    start_row, start_col = start_coord
+    if mode == 1:
+        # Ensures cell is some integer - Not a bomb
+        return [start_row*cols + start_col]
+    # Ensures cell is a "0", so nothing around it can be a bomb either
+    return [row*cols + col for row in range(max(start_row-1, 0), min(start_row+2, rows))
+                           for col in range(max(start_col-1, 0), min(start_col+2, cols))]
+
+
+def allowed_indices(rows: int, cols: int, start_coord: tuple[int, int], mode: int) -> list[int]:
+    """Returns the flat indices of the cells that can be mines, in increasing order (see `blocked_indices()`)"""
+    blocked = set(blocked_indices(rows, cols, start_coord, mode))
+    return [i for i in range(rows*cols) if i not in blocked]
+
+
+def blocked_sizes(rows: int, cols: int, mode: int) -> set[int]:
+    """Returns every possible number of blocked cells (see `blocked_indices()`), which only depends on where the start is"""
+    if mode == 1:
+        return {1}
+    spans = lambda size: {min(size, 2), min(size, 3)}  # The 3x3 is cut to 2 rows/cols on the edges
+    return {row_span*col_span for row_span in spans(rows) for col_span in spans(cols)}
+
+
+def remap_slots(slots, blocked: list[int]):
+    """Maps mine positions picked among the allowed cells (slots, in range(rows*cols - len(blocked))) to flat indices
+
+    Slot i is the i-th allowed cell, so slots drawn before the start is known can be placed around any start with as many
+    blocked cells. Works on a list, or a NumPy array of slots
+    """
+    if np is not None and isinstance(slots, np.ndarray):
+        slots = slots.copy()
+        for index in blocked:   # In increasing order, every blocked cell at or before a slot shifts it by one
+            slots += slots >= index
+        return slots
+    remapped = []
+    for slot in slots:
+        for index in blocked:
+            if slot < index:
+                break
+            slot += 1
+        remapped.append(slot)
+    return remapped
+
+
+@lru_cache(maxsize=8)
+def neighbour_table(rows: int, cols: int) -> list[tuple[int, ...] | None]:
+    """Returns the table of the flat indices of the cells around every cell of a `rows` x `cols` board, shared by all boards of that size
+
+    The table starts as None for every cell and is filled in by `Board.neighbour_indices()` as the cells are visited,
+    so creating a board doesn't cost a pass over all of its cells
+    """
+    return [None] * (rows*cols)
+
+
+def generate_int_matrix(rows: int, cols: int, bombs: int, start_coord: tuple[int, int], mode: int, rng=None, backend="auto", slots=None) -> list[list[int]]:
+    """Generates random minefield - 2D Array of ints, where -1 is a mine and others are the number of mines around it
+
+        Args:
+            rows, cols, bombs: Size of the minefield and number of mines in it
+            start_coord: (row, col) of the first cell clicked
+            mode:
+                0 - (Are you cheating?): Ensures 1st cell is always a "0"
+                1 - (Standard): Ensures 1st cell is minimally an integer
+                2 - (No guessing): Same minefield as mode 0, `Board` only keeps the seeds the solver clears without guessing (see `noguess`)
+            rng: Seed (int) of a `SplitMix64` stream, or object with a `random.Random`-like `.sample()` that picks the mines
+                (defaults to the `random` module)
+            backend:
+                "numpy" - Vectorised counting with NumPy
+                "python" - Pure-Python fallback
+                "auto" - "numpy" if it is installed, else "python"
+            Both backends give the same minefield for the same `rng` state
+            slots: Mine positions already drawn from `rng` among the allowed cells (see `remap_slots()`), eg. by a `BoardPreparer` """
+    if rng is None:
+        rng = random
+    elif isinstance(rng, int):
+        rng = SplitMix64(rng)
+    if backend == "auto":
+        backend = "python" if np is None else "numpy"
+
+    blocked = blocked_indices(rows, cols, start_coord, mode)
+
+    def pick_bombs() -> list[int]:
+        """Picks `bombs` distinct allowed cells, in a single draw"""
+        no_allowed = rows*cols - len(blocked)
+        if bombs > no_allowed:
+            raise ValueError(f"Cannot place {bombs} bombs in {no_allowed} allowed cells")
+        return slots if slots is not None else rng.sample(range(no_allowed), bombs)
+
+    def generate_python() -> list[list[int]]:
+        int_matrix = [[0]*cols for _ in range(rows)]
+        for index in remap_slots(pick_bombs(), blocked):
+            row, col = divmod(index, cols)
+            int_matrix[row][col] = -1
+        allocate_val(int_matrix)
+        return int_matrix
+
+    def allocate_val(int_matrix) -> list[list[int]]:
+        """Allocates value of cell according to mines surrounding it using an extended field"""
+        extended = [[0]*(cols+2)]
+        for row in range(rows):
+            extended.append([0] + int_matrix[row] + [0])
+        extended.append([0]*(cols+2))
+
+        for y in range(1, rows+1):
+            for x in range(1, cols+1):
+                if extended[y][x] != -1:
+                    int_matrix[y-1][x-1] = count_mines(y, x, extended)
+
+    def count_mines(y: int, x: int, extended: list) -> int:
+        """Counts mines around a centre cell"""
+        count = 0
+        for a in range(-1, 2):
+            for b in range(-1, 2):
+                if extended[y+a][x+b] == -1:
+                    count += 1
+        return count
+
+    def generate_numpy() -> list[list[int]]:
+        is_mine = np.zeros(rows*cols, dtype=bool)
+        is_mine[remap_slots(np.array(pick_bombs(), dtype=np.intp), blocked)] = True
+        return count_mines_numpy(is_mine.reshape(rows, cols)).tolist()
+
+    if backend == "numpy":
+        return generate_numpy()
+    if backend == "python":
+        return generate_python()
+    raise ValueError(f"Unknown backend {backend!r}")
+
+
+def count_mines_numpy(is_mine):
+    """Returns the int matrix (-1 for mines) of a boolean mine grid, or of a stack of them along the first axis
+
+    Number of mines around each cell = sum of the 9 shifted slices of a zero-padded mine grid
+    """
+    rows, cols = is_mine.shape[-2:]
+    padded = np.zeros(is_mine.shape[:-2] + (rows+2, cols+2), dtype=np.int8)
+    padded[..., 1:-1, 1:-1] = is_mine
+    counts = sum(padded[..., y:y+rows, x:x+cols] for y in range(3) for x in range(3))
+    return np.where(is_mine, np.int8(-1), counts)
+
+
+def generate_int_matrices(rows: int, cols: int, bombs: int, start_coord: tuple[int, int], mode: int, seeds, batch_size=4096):
+    """Bulk generator of seeded minefields, for offline evaluation of millions of boards
+
+    Yields them in batches of up to `batch_size`, in the order of `seeds`:
+    - With NumPy, as an int8 array of shape (batch, rows, cols), the `SplitMix64` streams of a batch are run side by side
+    - Without NumPy, as a list of int matrices
+    Board i of the output is the same as `generate_int_matrix(rows, cols, bombs, start_coord, mode, seeds[i])`
+    """
+    seeds = list(seeds)
+    allowed = allowed_indices(rows, cols, start_coord, mode)
+    if bombs > len(allowed):
+        raise ValueError(f"Cannot place {bombs} bombs in {len(allowed)} allowed cells")
+    for start in range(0, len(seeds), batch_size):
+        batch = seeds[start:start+batch_size]
+        if np is None:
+            yield [generate_int_matrix(rows, cols, bombs, start_coord, mode, seed, "python") for seed in batch]
+            continue
+
+        # Vectorised SplitMix64.sample(allowed, bombs) for every seed of the batch
+        n = len(allowed)
+        state = np.array([seed & MASK64 for seed in batch], dtype=np.uint64)
+        pool = np.tile(np.arange(n, dtype=np.int32), (len(batch), 1))
+        board_ind = np.arange(len(batch))
+        for i in range(bombs):
+            state += np.uint64(0x9E3779B97F4A7C15)
+            z = state.copy()
+            z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            z ^= z >> np.uint64(31)
+            j = i + (((z >> np.uint64(32)) * np.uint64(n - i)) >> np.uint64(32)).astype(np.intp)
+            picked = pool[board_ind, j]
+            pool[board_ind, j] = pool[:, i]
+            pool[:, i] = picked
+
+        is_mine = np.zeros((len(batch), rows*cols), dtype=bool)
+        is_mine[board_ind[:, None], np.array(allowed)[pool[:, :bombs]]] = True
+        yield count_mines_numpy(is_mine.reshape(len(batch), rows, cols))
+
+
+class BoardPreparer(threading.Thread):
+    """Draws the mines of the next game in a background thread, before the first click is known
+
+    The slots (see `remap_slots()`) are drawn from `seed` for every possible number of blocked cells around the first click,
+    so the click only has to remap them and count the values. The board is the same as one generated from `seed` on the click
+
+    Attributes:
+        rows, cols, bombs, mode, seed: The game being prepared
+        slots (dict[int, list[int]] | None): Number of blocked cells: mine slots, set once the thread is done
+    """
+    def __init__(self, rows: int, cols: int, bombs: int, mode: int, seed: int):
+        super().__init__(daemon=True)
+        self.rows, self.cols, self.bombs, self.mode, self.seed = rows, cols, bombs, mode, seed
+        self.slots = None
+
+    def run(self) -> None:
+        slots = {}
+        for size in blocked_sizes(self.rows, self.cols, self.mode):
+            no_allowed = self.rows*self.cols - size
+            if self.bombs <= no_allowed:
+                slots[size] = SplitMix64(self.seed).sample(range(no_allowed), self.bombs)
+        self.slots = slots
+
+
+class BoardMetrics():
+    """Difficulty metrics of a generated board, see `board_metrics()`
+
+    Attributes:
+        bbbv (int): 3BV, the minimum number of clicks clearing the board without flags (every opening, plus every number outside them)
+        openings (int): Number of openings, groups of touching "0"s that are exposed by a single click
+        opening_sizes (list[int]): Number of cells each opening exposes (its "0"s and the numbers around them), in the order of their first cell
+        islands (int): Groups of touching numbers that no opening exposes
+    """
+    def __init__(self, bbbv: int, openings: int, opening_sizes: list[int], islands: int):
+        self.bbbv = bbbv
+        self.openings = openings
+        self.opening_sizes = opening_sizes
+        self.islands = islands
+
+    def __repr__(self):
+        return f"BoardMetrics(bbbv={self.bbbv}, openings={self.openings}, islands={self.islands})"
+
+
+def label_runs(mask: bytes, rows: int, cols: int) -> tuple[list[tuple[int, int, int]], list[int]]:
+    """Groups the touching 1s (diagonals included) of the flat `mask` with a single scan of its runs of 1s, row by row
+
+    Returns:
+        (runs, groups): every run as (row, start col, end col), and the group of each run,
+            numbered by its first run (the groups of runs touching the run above them are merged with union-find)
+    """
+    runs, parent = [], []
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = node = parent[parent[node]]
+        return node
+
+    above = []  # (start, end, node) of the runs of the previous row
+    for row in range(rows):
+        offset = row*cols
+        current = []
+        no_above = len(above)
+        i = 0
+        for match in RUN.finditer(mask, offset, offset + cols):
+            start, end = match.span()
+            start -= offset
+            end -= offset
+            root = node = len(parent)
+            parent.append(node)
+            runs.append((row, start, end))
+            while i < no_above and above[i][1] < start:   # Ends left of the cell diagonally above `start`
+                i += 1
+            j = i
+            while j < no_above and above[j][0] <= end:    # Starts up to the cell diagonally above the end
+                other = find(above[j][2])
+                if other < root:    # Groups are merged into their lowest node
+                    parent[root] = root = other
+                elif other > root:
+                    parent[other] = root
+                j += 1
+            current.append((start, end, node))
+        above = current
+    return runs, [find(node) for node in range(len(parent))]
+
+
+def board_metrics(values, rows: int, cols: int) -> BoardMetrics:
+    """Computes the `BoardMetrics` of the flat values (-1 for mines) of a board, eg. `Board.values` or a flattened `generate_int_matrix()`
+
+    The numbers next to an opening are found by dilating the "0"s as one whole number (a byte per cell, shifted by a cell and by a row),
+    then the openings and the islands are labelled with `label_runs()`, a single linear scan
+    """
+    size = rows*cols
+    data = array("b", values).tobytes()    # -1 as 0xFF
+    zeros = data.translate(ZERO_BYTES)
+
+    # 1 for every cell that is a "0" or next to one, a guard column of 0s stops the dilation from wrapping around rows
+    width = cols + 1
+    padded = b"\x00".join(zeros[row*cols:(row+1)*cols] for row in range(rows)) + b"\x00"
+    dilated = int.from_bytes(padded, "big")
+    dilated |= dilated << 8 | dilated >> 8
+    dilated |= dilated << 8*width | dilated >> 8*width
+    near_zero = (dilated & ((1 << 8*len(padded)) - 1)).to_bytes(len(padded), "big")
+    near_zero = b"".join(near_zero[row*width:row*width+cols] for row in range(rows))
+    isolated = (int.from_bytes(data.translate(NUMBER_BYTES), "big") & ~int.from_bytes(near_zero, "big")).to_bytes(size, "big")
+
+    # An opening exposes the cells around its "0"s (never mines), so its size is the area of its runs widened by a cell on every side
+    runs, groups = label_runs(zeros, rows, cols)
+    widened = {}    # Row: [(group, start col, end col)] of the widened runs on that row
+    for (row, start, end), group in zip(runs, groups):
+        for r in range(max(row-1, 0), min(row+2, rows)):
+            widened.setdefault(r, []).append((group, max(start-1, 0), min(end+1, cols)))
+    opening_sizes = dict.fromkeys(groups, 0)
+    for intervals in widened.values():
+        intervals.sort()
+        group, start, end = intervals[0]
+        for other_group, other_start, other_end in intervals[1:]:
+            if other_group == group and other_start <= end:     # Overlapping runs of the same opening
+                end = max(end, other_end)
+                continue
+            opening_sizes[group] += end - start
+            group, start, end = other_group, other_start, other_end
+        opening_sizes[group] += end - start
+
+    islands = len(set(label_runs(isolated, rows, cols)[1]))
+    return BoardMetrics(len(opening_sizes) + isolated.count(1), len(opening_sizes), list(opening_sizes.values()), islands)
+
+
+class Board():
+    """The state of a Minesweeper game, held in flat arrays indexed by row*cols + col
+
+    Subclasses (eg. `minesweeper.Minefield`) are notified of changes through the `.on_...()` hooks, which do nothing here
+
+    Attributes:
+        rows, cols, bombs (int): Size of the board and number of mines in it
+        mode (int): Generation mode, see `generate_int_matrix()`
+        game_mode (int | None): Mode the current game was generated in (None before the first click), `.mode` unless it was
+            started from a board ID of another mode
+        seed (int | None): Seed the mines were generated from (None before the first click)
+        no_guess_verified (bool | None): In a mode 2 game, if the board was checked to be clearable without guessing, False if the
+            search ran out of `.no_guess_budget` and an unchecked mode 0 board is played instead (None in other modes or from a seed given)
+        fixed_seed (int | None): If set, every game on this board is generated from this seed, else a new seed is drawn each game
+        start_coord ((int, int) | None): The first clicked cell the mines were generated around
+        mines (bytearray): 1 if the square is a mine
+        values (array[int]): Number of bombs around the square (-1 for mines, or before the board is generated)
+        exposed (bytearray): 1 if the square is exposed
+        flagged (bytearray): 1 if the square is flagged
+        is_started (bool): if the mines have been generated (after the first click)
+        is_over (bool): if the game has been won or lost, no more moves are accepted after this
+        won (bool): if the game has been won
+        no_exposed: Number of exposed cells (including mines)
+        remaining_bombs: Number of bombs minus number of flags
+        safe_remaining: Number of non-mine cells that are not exposed yet, the game is won when it reaches 0
+        preparer (BoardPreparer | None): The mines of the next game, drawn in the background by `.prepare_next_game()`
+        recorder (replay.Recorder | None): If set, every game started and move made is recorded with `.recorder.record(board, action, index)`
+    """
+    debug = False   # Runs (slow) consistency checks of the counters after every move
+    no_guess_budget = 1.0   # Seconds the first click of a mode 2 game may spend searching a no-guess board
+
+    def __init__(self, rows: int, cols: int, bombs: int, mode=1, seed=None):
+        self.rows, self.cols, self.bombs = board_size(None, rows, cols, bombs, mode)
+        self.mode = mode
+        self.game_mode = None
+        self.no_guess_verified = None
+        self.fixed_seed = seed
+        self.seed = None
+        self.start_coord = None
+        self.preparer = None
+        self.recorder = None
+        self._metrics = None
+        size = rows*cols
+        self._neighbours = neighbour_table(rows, cols) if size <= NEIGHBOUR_TABLE_MAX else None
+        self.mines = bytearray(size)
+        self.values = array("b", [-1]) * size
+        self.exposed = bytearray(size)
+        self.flagged = bytearray(size)
+        self.is_started = False
+        self.is_over = False
+        self.won = False
+
+        self.no_exposed = 0
+        self.remaining_bombs = bombs
+        self.safe_remaining = size - bombs
+
+    # Hooks
+    def on_game_start(self) -> None:
+        """Called after the board is generated"""
+
+    def on_game_end(self, won: bool, index: int) -> None:
+        """Called once when the game is won or lost, `index` is the cell that ended it"""
+
+    def on_cells_changed(self, indices) -> None:
+        """Called with the indices of cells whose exposed/flagged state changed"""
+
+    # Geometry
+    def neighbours(self, coord: tuple[int, int]) -> list[tuple[int, int]]:
+        """Returns the (row, col) of the cells around `coord` that are inside the board"""
+        row, col = coord
+        return [(r, c) for r in range(max(row-1, 0), min(row+2, self.rows))
+                       for c in range(max(col-1, 0), min(col+2, self.cols))
+                       if (r, c) != coord]
+
+    def neighbour_indices(self, index: int) -> tuple[int, ...]:
+        """Returns the flat indices of the cells around the flat `index` that are inside the board"""
+        table = self._neighbours
+        if table is not None:
+            neighbours = table[index]
+            if neighbours is not None:
+                return neighbours
+        rows, cols = self.rows, self.cols
+        row, col = divmod(index, cols)
+        neighbours = tuple(r*cols + c for r in range(max(row-1, 0), min(row+2, rows))
+                                      for c in range(max(col-1, 0), min(col+2, cols))
+                                      if r != row or c != col)
+        if table is not None:
+            table[index] = neighbours
+        return neighbours
+
+    # Setup
+    def reset_board(self) -> None:
+        """Clears the whole board back to before the first click in one bulk operation"""
+        size = self.rows*self.cols
+        self.no_exposed = 0
+        self.remaining_bombs = self.bombs
+        self.safe_remaining = size - self.bombs
+        self.mines[:] = bytes(size)
+        self.values[:] = array("b", [-1]) * size
+        self.exposed[:] = bytes(size)
+        self.flagged[:] = bytes(size)
+        self.is_started = False
+        self.is_over = False
+        self.won = False
+        self.seed = None
+        self.game_mode = None
+        self.no_guess_verified = None
+        self.start_coord = None
+        self._metrics = None
+        self.on_cells_changed(range(size))
+        if self.recorder is not None:
+            self.recorder.record(self, "restart", 0)
+
+    def generate_int_matrix(self, start_coord: tuple[int, int], mode: int, rng=None, backend="auto", slots=None) -> list[list[int]]:
+        """Generates a random minefield of this board's size, see `generate_int_matrix()`"""
+        return generate_int_matrix(self.rows, self.cols, self.bombs, start_coord, mode, rng, backend, slots)
+
+    def fill_matrix(self, start_coord: tuple[int, int], mode: int, seed=None) -> None:
+        """Fills the board with new values and mines, generated from `seed`, `.fixed_seed` or a new seed
+
+        In mode 2, the seed is the first no-guess one found from `.fixed_seed` or at random (see `noguess.find_seed()`),
+        `.no_guess_verified` is False if none was found in time.
+        A `seed` given (eg. the seed of a board ID) is used as is without searching, as a mode 2 board is the mode 0 board of its seed.
+        If `.prepare_next_game()` finished drawing the mines, they are only remapped around `start_coord`
+        """
+        preparer, self.preparer = self.preparer, None
+        slots = None
+        self.no_guess_verified = None
+        if seed is not None:
+            self.seed = seed
+        elif mode == 2:
+            import noguess  # Imports this module
+            self.seed, self.no_guess_verified = noguess.find_seed(self.rows, self.cols, self.bombs, start_coord, self.fixed_seed, self.no_guess_budget)
+        elif preparer is not None and preparer.slots is not None and preparer.mode == mode:
+            self.seed = preparer.seed
+            slots = preparer.slots.get(len(blocked_indices(self.rows, self.cols, start_coord, mode)))
+        else:
+            self.seed = new_seed() if self.fixed_seed is None else self.fixed_seed
+        self.start_coord = tuple(start_coord)
+        self.game_mode = mode
+        self.load_int_matrix(self.generate_int_matrix(start_coord, mode, self.seed, slots=slots))
+
+    def load_int_matrix(self, int_matrix: list[list[int]]) -> None:
+        """Fills the board with the values and mines (-1) of `int_matrix`"""
+        self.values = array("b", chain.from_iterable(int_matrix))
+        self.mines = bytearray(self.values.tobytes().translate(MINE_BYTES))
+        self._metrics = None
+        self.is_started = True
+
+    def start_game(self, start_coord: tuple[int, int], seed=None, mode=None) -> None:
+        """Generates the board around the first clicked `start_coord`, in `mode` (defaults to `.mode`) from `seed` if given (see `.fill_matrix()`)"""
+        self.fill_matrix(start_coord, self.mode if mode is None else mode, seed)
+        if self.recorder is not None:
+            self.recorder.record(self, "start", start_coord[0]*self.cols + start_coord[1])
+        self.on_game_start()
+
+    def start_board_id(self, board_id: str) -> None:
+        """Starts the game of `board_id` on this (reset) board, which must be of the same size, with nothing exposed yet"""
+        params = parse_board_id(board_id)
+        if (params["rows"], params["cols"], params["bombs"]) != (self.rows, self.cols, self.bombs):
+            raise ValueError(f"Board ID {board_id!r} is not of a {self.rows}x{self.cols} board with {self.bombs} bombs")
+        self.preparer = None
+        self.start_game(params["start_coord"], params["seed"], params["mode"])     # The mode of the next games is left as it was
+
+    def prepare_next_game(self, start_coords=None) -> None:
+        """Starts generating the next game in the background, so the first click doesn't have to (eg. while the game-over pop-up is shown)
+
+        Modes 0 and 1 draw the mines in a `BoardPreparer` thread. Mode 2 searches no-guess boards in a process pool for the
+        likely first clicks `start_coords`, defaulting to the last first click and the middle of the board (see `noguess.prepare()`)
+        """
+        if self.mode != 2:
+            seed = new_seed() if self.fixed_seed is None else self.fixed_seed
+            self.preparer = BoardPreparer(self.rows, self.cols, self.bombs, self.mode, seed)
+            self.preparer.start()
+            return
+        if self.fixed_seed is not None:
+            return
+        if start_coords is None:
+            start_coords = [(self.rows//2, self.cols//2)]
+            if self.start_coord is not None and self.start_coord not in start_coords:
+                start_coords.insert(0, self.start_coord)
+        import noguess
+        noguess.prepare(self.rows, self.cols, self.bombs, start_coords)
+
+    @property
+    def board_id(self) -> str | None:
+        """ID of the current board (None before the first click), see `make_board_id()`"""
+        if self.seed is None:
+            return None
+        return make_board_id(self.rows, self.cols, self.bombs, self.game_mode, self.start_coord, self.seed)
+
+    @property
+    def metrics(self) -> BoardMetrics | None:
+        """Difficulty metrics of the current board (None before the first click), see `board_metrics()`
+
+        Computed the first time they are asked for after the board is generated, so boards that are never scored don't pay for them
+        """
+        if self._metrics is None and self.is_started:
+            self._metrics = board_metrics(self.values, self.rows, self.cols)
+        return self._metrics
+
+    @classmethod
+    def from_preset(cls, preset: str, mode=1, seed=None) -> "Board":
+        """Creates a board with the size of `preset` (see `PRESETS`)"""
+        return cls(*board_size(preset), mode, seed)
+
+    @classmethod
+    def from_board_id(cls, board_id: str) -> "Board":
+        """Rebuilds the board of `board_id`, started (but with nothing exposed yet) at it's start_coord"""
+        params = parse_board_id(board_id)
+        board = cls(params["rows"], params["cols"], params["bombs"], params["mode"], params["seed"])
+        board.start_board_id(board_id)
+        return board
+
+    # Moves
+    def flag_cell(self, index: int) -> None:
+        """Toggles whether or not the unexposed square at `index` is flagged"""
+        if self.recorder is not None:
+            self.recorder.record(self, "flag", index)
+        if self.is_over or self.exposed[index]:
+            return
+        self.flagged[index] ^= 1
+        if self.flagged[index]:
+            self.remaining_bombs -= 1
+        else:
+            self.remaining_bombs += 1
+        self.on_cells_changed((index,))
+        if self.debug:
+            self.check_counters()
+
+    def flag(self, coord: tuple[int, int]) -> None:
+        """Toggles whether or not the cell at `coord` is flagged"""
+        self.flag_cell(coord[0]*self.cols + coord[1])
+
+    def expose(self, coord: tuple[int, int]) -> list[int]:
+        """Exposes the cell at `coord`, see `.expose_cells()`"""
+        return self.expose_cells([coord])
+
+    def chord(self, coord: tuple[int, int]) -> list[int]:
+        """Exposes the cells around the exposed cell at `coord` if exactly its value of them are flagged"""
+        index = coord[0]*self.cols + coord[1]
+        if self.recorder is not None:
+            self.recorder.record(self, "chord", index)
+        if not self.exposed[index]:
+            return []
+        flagged = self.flagged
+        if sum(flagged[neighbour] for neighbour in self.neighbour_indices(index)) != self.values[index]:
+            return []
+        return self._expose_cells(self.neighbours(coord))
+
+    def expose_cells(self, coords) -> list[int]:
+        """Exposes the cells at `coords` (row, col) as one move, returning the indices of the newly exposed cells
+
+        Cells around an exposed 0 are flood-filled iteratively (BFS), so large openings can't hit the recursion limit,
+        and the rest of an opening bigger than `FILL_CELLS` is filled a run of a row at a time (see `._fill_openings()`).
+        Counters are updated once, and the win/lose condition is only checked once at the end.
+        Flagged or already exposed cells are skipped.
+        """
+        if self.recorder is not None:
+            coords = list(coords)
+            for row, col in coords:
+                self.recorder.record(self, "expose", row*self.cols + col)
+        return self._expose_cells(coords)
+
+    def _expose_cells(self, coords) -> list[int]:
+        """`.expose_cells()` without recording the move, for moves recorded as something else (eg. a chord)"""
+        if self.is_over:
+            return []
+        exposed, flagged, values, cols = self.exposed, self.flagged, self.values, self.cols
+        queue = deque()
+        mines = []  # Only the cells at `coords` can be mines, openings never contain any
+        for row, col in coords:
+            index = row*cols + col
+            if not exposed[index] and not flagged[index]:
+                exposed[index] = 1  # Marked when queued, so each cell is only queued once
+                queue.append(index)
+                if values[index] < 0:
+                    mines.append(index)
+
+        opened = []
+        while queue:
+            if len(opened) > FILL_CELLS:
+                self._fill_openings(queue, opened)
+                break
+            index = queue.popleft()
+            opened.append(index)
+            if values[index] != 0:  # Mines have a value of -1
+                continue
+            for neighbour in self.neighbour_indices(index):    # If cell is 0, we expose those around it
+                if not exposed[neighbour] and not flagged[neighbour]:
+                    exposed[neighbour] = 1
+                    queue.append(neighbour)
+
+        if not opened:
+            return opened
+        self.no_exposed += len(opened)
+        self.safe_remaining -= len(opened) - len(mines)
+        self.on_cells_changed(opened)
+        if self.debug:
+            self.check_counters()
+
+        # Check Losing Condition
+        if mines:
+            self.end_game(False, mines[0])
+        # Check Winning Condition
+        elif self.check_win():
+            self.end_game(True, opened[-1])
+        return opened
+
+    def _fill_openings(self, queue, opened: list[int]) -> None:
+        """Finishes the flood fill of `._expose_cells()` from the cells of its `queue`, adding the newly exposed cells to `opened`
+
+        The rest of the openings (the unexposed, unflagged "0"s touching the "0"s of `queue`, diagonals included, and the cells around them)
+        is filled a run of "0"s of a row at a time (a scanline fill), each run looking for the runs touching it in the rows above and below,
+        then the cells around the runs are exposed a run at a time, so each cell only costs bulk bytes operations
+        """
+        rows, cols = self.rows, self.cols
+        exposed, flagged, values = self.exposed, self.flagged, self.values
+        zeros = []
+        for index in queue:
+            if values[index] == 0:
+                exposed[index] = 0  # Exposed again with its opening
+                zeros.append(index)
+            else:
+                opened.append(index)
+        masks = {}  # Row: 1 for the "0"s of the row that can still be filled, built when the fill first reaches the row
+
+        def row_mask(row: int) -> bytearray:
+            mask = masks.get(row)
+            if mask is None:
+                start, end = row*cols, (row+1)*cols
+                blocked = int.from_bytes(exposed[start:end], "big") | int.from_bytes(flagged[start:end], "big")
+                zero = int.from_bytes(values[start:end].tobytes().translate(ZERO_BYTES), "big")
+                mask = masks[row] = bytearray((zero & ~blocked).to_bytes(cols, "big"))
+            return mask
+
+        filled = []     # (row, start col, end col) of the filled runs
+        stack = [(index // cols, index % cols, index % cols + 1) for index in zeros]    # (row, start col, end col) to look for runs in
+        while stack:
+            row, lo, hi = stack.pop()
+            mask = row_mask(row)
+            for match in list(RUN.finditer(mask, lo, hi)):
+                start, end = match.span()
+                if start == lo:     # The run can go on past the searched columns
+                    start = mask.rfind(0, 0, start) + 1
+                if end == hi:
+                    end = mask.find(0, end)
+                    if end < 0:
+                        end = cols
+                mask[start:end] = bytes(end - start)
+                filled.append((row, start, end))
+                if row > 0:
+                    stack.append((row - 1, max(start - 1, 0), min(end + 1, cols)))
+                if row < rows - 1:
+                    stack.append((row + 1, max(start - 1, 0), min(end + 1, cols)))
+
+        # The runs widened by a cell on every side, merged row by row
+        around = {}
+        for row, start, end in filled:
+            for r in range(max(row - 1, 0), min(row + 2, rows)):
+                around.setdefault(r, []).append((max(start - 1, 0), min(end + 1, cols)))
+        for row, intervals in around.items():
+            intervals.sort()
+            merged = [list(intervals[0])]
+            for start, end in intervals[1:]:
+                if start <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            for start, end in merged:
+                start, end = row*cols + start, row*cols + end
+                blocked = (int.from_bytes(exposed[start:end], "big") | int.from_bytes(flagged[start:end], "big")).to_bytes(end - start, "big")
+                for match in GAP.finditer(blocked):
+                    a, b = start + match.start(), start + match.end()
+                    exposed[a:b] = b"\x01" * (b - a)
+                    opened.extend(range(a, b))
+
+    def end_game(self, won: bool, index: int) -> None:
+        self.is_over = True
+        self.won = won
+        self.on_game_end(won, index)
+
+    def check_win(self) -> bool:
+        """Winning condition, all non-mine cells are exposed"""
+        return self.safe_remaining == 0
+
+    def reveal_mines(self) -> None:
+        """Exposes all unflagged mines at the end of the game"""
+        mines, exposed, flagged = self.mines, self.exposed, self.flagged
+        revealed = [index for index in range(self.rows*self.cols) if mines[index] and not exposed[index] and not flagged[index]]
+        for index in revealed:
+            exposed[index] = 1
+        self.no_exposed += len(revealed)
+        self.on_cells_changed(revealed)
+        if self.debug:
+            self.check_counters()
+
+    # Counters
+    def count(self) -> tuple[int, int, int]:
+        """Returns (no_exposed, remaining_bombs, safe_remaining) from a full scan of the cells"""
+        no_exposed = self.exposed.count(1)
+        exposed_mines = self.exposed_mines().count(1)
+        safe_remaining = self.rows*self.cols - self.bombs - (no_exposed - exposed_mines)
+        return no_exposed, self.bombs - self.flagged.count(1), safe_remaining
+
+    def exposed_mines(self) -> bytes:
+        """Returns 1 for every exposed mine and 0 for other cells, ANDing the bitmaps as whole numbers instead of per cell"""
+        size = self.rows*self.cols
+        return (int.from_bytes(self.exposed, "little") & int.from_bytes(self.mines, "little")).to_bytes(size, "little")
+
+    def recount(self) -> None:
+        """Rebuilds the counters from a full scan, for when cells are changed without going through moves (eg. loading a game)"""
+        self.no_exposed, self.remaining_bombs, self.safe_remaining = self.count()
+
+    def check_counters(self) -> None:
+        """Debugging - Asserts the maintained counters agree with a full scan of the cells"""
+        counted = self.count()
+        maintained = (self.no_exposed, self.remaining_bombs, self.safe_remaining)
+        assert maintained == counted, f"Counters (no_exposed, remaining_bombs, safe_remaining) are {maintained}, a full scan gives {counted}"
+
+    def __str__(self):
+        """The board as text, "*" for exposed mines, "F" for flags and "X" for unexposed cells"""
+        lines = []
+        for row in range(self.rows):
+            line = []
+            for index in range(row*self.cols, (row+1)*self.cols):
+                if self.exposed[index]:
+                    line.append("*" if self.mines[index] else str(self.values[index]))
+                else:
+                    line.append("F" if self.flagged[index] else "X")
+            lines.append(" ".join(line))
+        return "\n".join(lines)
@@ -1,24 +1,76 @@
+import time
+launched = time.perf_counter()  # The start up is timed from here, see `startup` below
 from config import *
 import pygame as pg
 # import numpy as np
 import UI
 import minesweeper
+import os
+import engine
+# Only imported if the settings need them
+if RECORDING_PATH is not None or REPLAY_PATH is not None:
+    import replay
+if AUTOSAVE_PATH is not None:
+    import snapshot
+startup = None  # Times the start up, printed with the first frame
+if PROFILE:
+    import profiler
+    startup = profiler.StartupTimer(launched)
+    startup.mark("imports")
 
 pg.init()
 pg.display.set_caption('Minesweeper')
 screen = pg.display.set_mode((960,540))
 screen_rect = screen.get_rect()
+clock = pg.time.Clock()
+if startup is not None:
+    startup.mark("window")
 
 # push minesweeper board down 
 screen_rect.center = (screen_rect.center[0], screen_rect.center[1]+10)
 
-cellstyle = UI.CellButtonStyle(("assets/cell/idle.png", "assets/cell/hover.png"), "assets/cell/flag.png", "assets/cell/mine.png", "assets/cell/")
-minefield = minesweeper.Minefield(screen_rect.center, cellstyle, mode=GAMEMODE)     # Creates a minefield with the given cellstyle and mode
+cellstyle = UI.CellButtonStyle.from_dir(CELL_IMGS_DIR, CELL_BUNDLE_PATH)   # From the pre-baked bundle if it's up to date
+if startup is not None:
+    startup.mark("cell images")
+if REPLAY_PATH is None:
+    minefield = minesweeper.Minefield(screen_rect.center, cellstyle, mode=GAMEMODE, seed=SEED, preset=PRESET)     # Creates a minefield with the given cellstyle and mode
+    minefield.prepare_next_game()     # No-guess boards (GAMEMODE 2) are searched in the background before the first click
+else:
+    replay_games = replay.load(REPLAY_PATH)
+    replay_board = engine.parse_board_id(replay_games[0].board_id)  # The minefield is of the size of the recorded games
+    minefield = minesweeper.Minefield(screen_rect.center, cellstyle, replay_board["mode"],
+                                      rows=replay_board["rows"], cols=replay_board["cols"], bombs=replay_board["bombs"])
+frame_profiler = None   # Created with PROFILE or by the first F3 (which toggles it), F4 exports it to PROFILE_PATH
+if PROFILE:
+    minefield.profiler = frame_profiler = profiler.FrameProfiler(True)
+replayer = None     # Plays the recording of REPLAY_PATH back, created after `restart_game()`
+recorder = None
+if REPLAY_PATH is None and RECORDING_PATH is not None:
+    minefield.recorder = recorder = replay.Recorder()
+
+# Resumes the game saved when the game was last closed
+autosaver = None
+resume_elapsed = 0  # Milliseconds already played in the resumed game, taken off the timer's start
+last_autosave = 0
+if REPLAY_PATH is None and AUTOSAVE_PATH is not None:
+    if os.path.exists(AUTOSAVE_PATH):
+        try:
+            resume_elapsed = snapshot.load(AUTOSAVE_PATH, minefield)
+        except (OSError, ValueError) as error:
+            print(f"Could not resume {AUTOSAVE_PATH}: {error}")
+        if minefield.is_over:
+            minefield.reset_board()
+    autosaver = snapshot.Autosaver(AUTOSAVE_PATH)
+if startup is not None:
+    startup.mark("minefield")
 game_ended = False
 game_start = False
+auto_play = False   # Toggled with the A key, plays the solver's moves every AUTOPLAY_DELAY ms
+last_auto_move = 0
 start_tick = pg.time.get_ticks()
 
 font = pg.font.Font("assets/fonts/Rare Game.otf", 32)
+hud_digits = UI.DigitStrip(font, COLOR_LIGHT)   # The timer and bomb counter are blitted from pre-rendered digits
 
 # Game Over Pop-Up Initialisation
 gameover_popup = UI.PopUp(pg.Rect(0,0,200,300), COLOR_LIGHT)
@@ -26,30 +78,93 @@ gameover_popup.rect.centerx = (screen_rect.w+minefield.board_abs_pos[0]+minefiel
 gameover_popup.rect.centery = screen_rect.h/2
 gameover_popup.set_border(COLOR_LIGHT2)
 gameover_popup.add_button(("assets/btn_restart_idle.png", "assets/btn_restart_hover.png"), lambda _:restart_game(), (150, 0, 0 ,0))
+if startup is not None:
+    startup.mark("hud")
+
+# Dirty-region rendering state
+redraw_all = True   # Forces the next frame to render and update the whole screen
+hud_values = None   # The (timer, bomb counter) values currently shown on screen
+hud_rects = []      # The areas currently covered by the timer and bomb counter
 
 def restart_game():
     global game_ended
     global game_start
+    global redraw_all
     game_ended = False
     game_start = False
     minefield.reset_board()
     gameover_popup.hide()
+    redraw_all = True   # The hidden pop-up has to be painted over
+
+def lap(name: str) -> None:
+    """Records the time since the previous lap as phase `name` of the frame, once the profiler is created"""
+    if frame_profiler is not None:
+        frame_profiler.lap(name)
+
+def render_hud(seconds: int, remaining_bombs: int) -> tuple[list[pg.Rect], list]:
+    """Lays out the timer and the bomb counter, returning their rects and the blits drawing them from `hud_digits`"""
+    text = str(seconds)
+    textRect = pg.Rect((0, 0), hud_digits.size(text))
+    textRect.centery = 30
+    textRect.left = screen_rect.center[0] - minefield.board.get_width()/2 # Render the timer at the left edge of the board
+
+    bomb_text = str(remaining_bombs)
+    bombRect = pg.Rect((0, 0), hud_digits.size(bomb_text))
+    bombRect.centery =  30
+    bombRect.right = screen_rect.center[0] + minefield.board.get_width()/2 # Render the bomb counter at the right edge of the board
+    return [bombRect, textRect], hud_digits.blits(bomb_text, bombRect.topleft) + hud_digits.blits(text, textRect.topleft)
+
+if REPLAY_PATH is not None:
+    replayer = replay.Replayer(minefield, replay_games, restart_game)
 
 while True:
     for event in pg.event.get():    # Event Loop                        
         if event.type == GAMESTART:
-            start_tick = pg.time.get_ticks()
+            start_tick = pg.time.get_ticks() - resume_elapsed
+            resume_elapsed = 0
             game_start = True
         if event.type == pg.QUIT:
+            if recorder is not None and recorder.games:
+                replay.save(RECORDING_PATH, recorder.games)
+            if autosaver is not None:
+                if game_start and not game_ended:
+                    autosaver.submit(minefield, pg.time.get_ticks() - start_tick)
+                autosaver.close()
             pg.quit()
             exit()
+        if event.type == pg.KEYDOWN:
+            if event.key == pg.K_h:     # Hint, plays one batch of guaranteed moves
+                minefield.hint()
+            elif event.key == pg.K_a:
+                auto_play = not auto_play
+            elif event.key == pg.K_F3:
+                if frame_profiler is None:
+                    import profiler
+                    minefield.profiler = frame_profiler = profiler.FrameProfiler()
+                frame_profiler.toggle()
+                redraw_all = True   # Shows or clears the overlay
+            elif event.key == pg.K_F4 and frame_profiler is not None:
+                frame_profiler.export(PROFILE_PATH)
+                print(f"Profile exported to {PROFILE_PATH}")
+        if event.type == pg.MOUSEWHEEL:     # Zooms the board around the mouse
+            minefield.zoom_at(pg.mouse.get_pos(), event.y)
         # Passes all mouse button up/down events too all listeners
         # Objecting in `listening_mouse_button` have listeners `._on_mouse_button()`
+        # These are only routers (`UI.button_router`, the minefield), which forward the event to the buttons under the mouse
+        if replayer is not None and not replayer.is_done and event.type in (pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP, pg.MOUSEMOTION):
+            continue    # The recording is only watched
+        if event.type == pg.MOUSEBUTTONUP:
+            if frame_profiler is not None:
+                frame_profiler.click()  # Latency from here to the frame showing the click
         if event.type == pg.MOUSEBUTTONDOWN or event.type == pg.MOUSEBUTTONUP:
-            for listening in listening_mouse_button.copy():
+            for listening in listening_mouse_button.copy():     # A listener's callback can add/remove listeners
                 listening._on_mouse_button(event)
+        # Hover states are only updated when the mouse moves, instead of polling every button every frame
+        if event.type == pg.MOUSEMOTION:
+            for listening in listening_mouse_button.copy():
+                listening._on_mouse_motion(event)
         if event.type == GAMEEND:
-            if game_ended:  # Ignore duplicate GAMEEND events that occurs when multiple Cell's .expose posts the event
+            if game_ended:  # Ignore duplicate GAMEEND events
                 continue
             if event.won:
                 gameover_popup.set_text(UI.Text("You\nWin!", 60), bounding_margins=(0, 120, 0, 0))
@@ -63,40 +178,105 @@ while True:
                 #     if not cell.is_mine and cell.is_flagged:
                 #         cell.button.set_imgs("assets/cell/flag_wrong.png")
 
-                for cells in minefield:
-                    for cell in cells:
-                        if cell.is_mine and not cell.is_flagged:
-                            cell.expose()
-                        if not cell.is_mine and cell.is_flagged:
-                            cell.set_imgs("assets/cell/flag_wrong.png")
+                minefield.reveal_mines()    # Exposes the unflagged mines without posting more GAMEEND events
+                for cell in minefield.cells():
+                    if not cell.is_mine and cell.is_flagged:
+                        cell.set_state(UI.CellButtonStyle.FLAG_WRONG)
             end_tick = pg.time.get_ticks()
+            if event.won:   # Efficiency: 3BV (the least clicks the board needs) per second
+                played = max(end_tick - start_tick, 1) / 1000
+                print(f"3BV {minefield.metrics.bbbv} in {played:.2f}s: {minefield.metrics.bbbv/played:.2f} 3BV/s")
             game_ended = True
+            if autosaver is not None:
+                autosaver.delete()
+            minefield.prepare_next_game()   # While the pop-up is shown
             minefield.suspend()
             gameover_popup.unhide()
 
-    screen.fill(COLOR_DARK) # Render the screen's background
-    minefield.draw_board()  # Render the cells onto the board
+    # Pans the board while the arrow keys are held
+    keys = pg.key.get_pressed()
+    pan = (keys[pg.K_RIGHT] - keys[pg.K_LEFT], keys[pg.K_DOWN] - keys[pg.K_UP])
+    if pan != (0, 0):
+        minefield.pan(pan[0]*PAN_SPEED, pan[1]*PAN_SPEED)
+
+    lap("events")
+
+    if replayer is not None:
+        replayer.tick(pg.time.get_ticks())
 
-    gameover_popup.draw()
+    if autosaver is not None and game_start and not game_ended and pg.time.get_ticks() - last_autosave >= AUTOSAVE_INTERVAL:
+        last_autosave = pg.time.get_ticks()
+        autosaver.submit(minefield, last_autosave - start_tick)  # Only copies the board, it is written in the background
+
+    if auto_play and not game_ended and pg.time.get_ticks() - last_auto_move >= AUTOPLAY_DELAY:
+        last_auto_move = pg.time.get_ticks()
+        if not minefield.hint():
+            auto_play = False   # Stuck, the player has to guess
+
+    lap("logic")
 
     if game_ended:
-        text = font.render(str(int((end_tick - start_tick) / 1000)), True, COLOR_LIGHT)
+        seconds = int((end_tick - start_tick) / 1000)
     elif not game_start:
-        text = font.render('0', True, COLOR_LIGHT)
+        seconds = 0
     else:
-        text = font.render(str(int((pg.time.get_ticks() - start_tick) / 1000)), True, COLOR_LIGHT)
-        
-    textRect = text.get_rect() 
-    textRect.centery = 30
-    textRect.left = screen_rect.center[0] - minefield.board.get_width()/2 # Render the timer at the left edge of the board
+        seconds = int((pg.time.get_ticks() - start_tick) / 1000)
 
-    bomb_text = font.render(str(minefield.remaining_bombs), True, COLOR_LIGHT)
-    bombRect = bomb_text.get_rect()
-    bombRect.centery =  30
-    bombRect.right = screen_rect.center[0] + minefield.board.get_width()/2 # Render the bomb counter at the right edge of the board
+    if not DIRTY_RENDERING or redraw_all:
+        screen.fill(COLOR_DARK) # Render the screen's background
+        minefield.draw_board()  # Render the cells onto the board
+        lap("board")
+
+        gameover_popup.draw()
+        lap("popup")
+
+        hud_values = (seconds, minefield.remaining_bombs)
+        hud_rects, hud = render_hud(*hud_values)
+        screen.blits(hud, doreturn=False) # Render the bomb counter and timer before the board
+        lap("text")
+        screen.blit(minefield.board, minefield.board_rect)  # Render the board onto the screen
+        if frame_profiler is not None:
+            frame_profiler.draw_overlay(screen, force=True)
+
+        pg.display.update()
+        redraw_all = False
+    else:
+        dirty_rects = []
+
+        # Only re-render the timer and bomb counter when their values change
+        if hud_values != (seconds, minefield.remaining_bombs):
+            hud_values = (seconds, minefield.remaining_bombs)
+            new_rects, hud = render_hud(*hud_values)
+            for old_rect, new_rect in zip(hud_rects, new_rects):
+                screen.fill(COLOR_DARK, old_rect)   # Clear the previous value, which might be wider
+                dirty_rects.append(old_rect.union(new_rect))
+            hud_rects = new_rects
+            screen.blits(hud, doreturn=False)
+        lap("text")
+
+        # Copy only the redrawn cells from the board onto the screen
+        for rect in minefield.draw_dirty():
+            dirty_rects.append(screen.blit(minefield.board, rect.move(minefield.board_abs_pos), rect))
+        lap("board")
+
+        if dirty_rects and gameover_popup.border_rect.collidelist(dirty_rects) != -1:
+            gameover_popup.is_dirty = True  # Something was drawn over the pop-up
+        dirty_rects += gameover_popup.draw_dirty()
+        lap("popup")
+        if frame_profiler is not None:
+            dirty_rects += frame_profiler.draw_overlay(screen)
 
-    screen.blit(bomb_text, bombRect) # Render the bomb counter before the board
-    screen.blit(text, textRect) # Render the timer before the board
-    screen.blit(minefield.board, minefield.board_rect)  # Render the board onto the screen
+        if dirty_rects:
+            pg.display.update(dirty_rects)
+    lap("update")
+    if frame_profiler is not None:
+        frame_profiler.frame_shown()
+    if startup is not None:
+        startup.mark("first frame")
+        print(startup.report())
+        startup = None
 
-    pg.display.update()
+    clock.tick(FPS)
+    lap("idle")
+    if frame_profiler is not None:
+        frame_profiler.end_frame()
@@ -1,106 +1,77 @@
 from config import *
 import pygame as pg
 import UI
-from random import randint
+import engine
 
 
-class Cell(UI.Button):
-    """A `Cell` is a `Button` object that user interacts with inside the minefield 
+class Cell():
+    """A `Cell` is a lightweight view of one square of a `Minefield`, created on demand
     
+    The state is not stored in the Cell, but read from/written to the minefield's arrays, so Cells can be thrown away freely
+
     Attributes:
         coord (int, int): The (row, col) of the Cell with reference to it's `minefield`
-        val (int): Number of bombs around this cell
+        index (int): The flat index (row*cols + col) of the Cell in the minefield's arrays
+        val (int): Number of bombs around this cell (-1 if is_mine or the minefield is not generated yet)
         is_mine (bool): if this cell is a mine
         is_flagged (bool): if this cell is flagged
-        self.is_exposed (bool): if this cell is exposed
-        self.minefield (Minefield): the minefield that the Cell is in
+        is_exposed (bool): if this cell is exposed
+        minefield (Minefield): the minefield that the Cell is in
     """
-    def __init__(self, coord: tuple[int, int], val: int, minefield: "Minefield", cellstyle: UI.CellButtonStyle, is_mine=False, is_flagged=False, is_exposed=False):
-        """Creates a `Cell` with a changeable `Button` associated to it"""
+    __slots__ = ("coord", "index", "minefield")
+
+    def __init__(self, coord: tuple[int, int], minefield: "Minefield"):
         self.coord = coord  # coord = (row, col) where top-left is 0,0
-        self.val = val  # Number of bombs around this cell (None if is_mine)
-        self.is_mine = is_mine  # Boolean
-        self.is_flagged = is_flagged # Don't care for now
-        self.is_exposed = is_exposed  # Sean will take care of this
-        self.cellstyle = cellstyle
+        self.index = coord[0]*minefield.cols + coord[1]
         self.minefield = minefield
 
-        row, col = coord
-        offset = ((CELLSIZE+GAP)*col, (CELLSIZE+GAP)*row)
-        super().__init__(self.cellstyle.normal_button_imgs, offset, None,
-            on_surface=self.minefield.board, surface_abs_pos=self.minefield.board_abs_pos)
-        self.button_to_start()
-        super().enable()
+    def __eq__(self, other):
+        return isinstance(other, Cell) and self.minefield is other.minefield and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.minefield), self.index))
+
+    def __repr__(self):
+        return f"Cell{self.coord}"
 
     # Setters / Getters
-    def set_mine(self, is_mine: bool):
-        """Setter for .is_mine"""
-        self.is_mine = is_mine
-
-    def set_val(self, val: int):
-        """Setter for .val"""
-        self.val = val
-
-    def reset_cell(self):
-        """Resets the Cell back and it's Button back to the start button"""
-        self.val = -1
-        self.is_mine = False
-        self.is_flagged = False
-        self.is_exposed = False
-        self.button_to_start()
-        super().enable()
+    @property
+    def val(self) -> int:
+        return self.minefield.values[self.index]
+
+    @property
+    def is_mine(self) -> bool:
+        return bool(self.minefield.mines[self.index])
+
+    @property
+    def is_flagged(self) -> bool:
+        return bool(self.minefield.flagged[self.index])
+
+    @property
+    def is_exposed(self) -> bool:
+        return bool(self.minefield.exposed[self.index])
+
+    def set_state(self, state: int):
+        """Overrides the Cell's image state (eg. `UI.CellButtonStyle.FLAG_WRONG`) until the minefield is reset"""
+        self.minefield.state_overrides[self.index] = state
+        self.minefield.dirty_cells.add(self.index)
 
     # Cell-Specific Methods
     def flag(self):
         """Toggles whether or not cell is flagged"""
-        self.is_flagged = not self.is_flagged
-        if self.is_flagged:
-            self.minefield.remaining_bombs -= 1
-        else: 
-            self.minefield.remaining_bombs += 1
-        self.update_button()
+        self.minefield.flag_cell(self.index)
 
     def expose(self):
-        """Expose this cell and `.expose_around()` if no mines around it"""
-        if self.is_exposed or self.is_flagged:
-            return
-
-        self.is_exposed = True
-        self.minefield.no_exposed += 1
-        if self.val == 0:   # If cell is 0, we expose those around it
-            self.expose_around()
-        self.update_button()
-
-        # Check Losing Condition
-        if self.is_mine:
-            print("Lose", self.coord)
-            pg.event.post(pg.event.Event(GAMEEND, {"won": False}))
-            
-        # Check Winning Condition
-        elif self.minefield.check_win():
-            print("Win")
-            pg.event.post(pg.event.Event(GAMEEND, {"won": True}))
+        """Expose this cell, flood-filling the cells around it if no mines around it (see `engine.Board.expose_cells()`)"""
+        self.minefield.expose(self.coord)
 
     def expose_around(self):    # Expose the cells around this cell
         """Exposes surrounding cells around this cell"""
-        y_range, x_range = (self.coord[0]-1, self.coord[0]+2), (self.coord[1]-1, self.coord[1]+2)
-        y_range = max(y_range[0], 0), min(ROWS, y_range[1])
-        x_range = max(x_range[0], 0), min(COLS, x_range[1])
-        for row in range(y_range[0], y_range[1]):
-            for col in range(x_range[0], x_range[1]):
-                    self.minefield[row][col].expose()
+        self.minefield.expose_cells(self.minefield.neighbours(self.coord))
     
     def attempt_expose_around(self):
-        flags = 0
-        y_range, x_range = (self.coord[0]-1, self.coord[0]+2), (self.coord[1]-1, self.coord[1]+2)
-        y_range = max(y_range[0], 0), min(ROWS, y_range[1])
-        x_range = max(x_range[0], 0), min(COLS, x_range[1])
-        for row in range(y_range[0], y_range[1]):
-            for col in range(x_range[0], x_range[1]):
-                if self.minefield[row][col].is_flagged:
-                    flags += 1
-        if flags == self.minefield[self.coord[0]][self.coord[1]].val and self.is_exposed:
-            self.expose_around()
+        """Exposes the surrounding cells if this cell is exposed and has exactly `.val` flags around it"""
+        self.minefield.chord(self.coord)
 
     def start_game(self, button):
         """Informs Minefield to start game, and exposes this cell after the game starts"""
@@ -110,195 +81,401 @@ class Cell(UI.Button):
         elif button == 3:
             self.flag()
 
-    # Button Changers
-    def update_button(self):
-        """Update the Cell's Button based on the Cell's current state"""
-        self.button_to_normal()
-        if self.is_exposed:
-            self.button_to_revealed()
-        elif self.is_flagged:
-            self.button_to_flagged()
-
-    def button_to_start(self):
-        """Returns a new Button that generates a minefield when clicked"""
-        super().set_imgs(self.cellstyle.normal_button_imgs)
-        super().set_funcs({1: lambda _: self.start_game(1),         # All buttons start by being a "start game" button
-                               3: lambda _: self.start_game(3)})        # Flags can be placed without starting game
-
-    def button_to_normal(self):
-        """Changes the Cell's Button to the Normal Button"""
-        super().set_imgs(self.cellstyle.normal_button_imgs)
-        super().set_funcs({1: lambda _:self.expose(), 3: lambda _: self.flag()})
-    
-    def button_to_flagged(self):
-        """Changes the Cell's Button to the Flagged Button"""
-        super().set_imgs(self.cellstyle.flag_button_imgs)
-        super().set_funcs({3: lambda _: self.flag()})
-
-    def button_to_revealed(self):
-        """Changes the Cell's Button to the Revealed Button"""
-        if self.is_mine:
-            super().set_imgs(self.cellstyle.mine_button_imgs)
-        else:
-            super().set_imgs(self.cellstyle.num_buttons_imgs[self.val])
-        super().set_funcs({1: lambda _:self.attempt_expose_around()})
+    def start_exposing(self):
+        """Starts the game by left clicking this cell"""
+        self.start_game(1)
 
-class Minefield(list[list[Cell]]):
-    """Minefield is a `list` of `Cell` lists with its own attributes and functions
+    def start_flagging(self):
+        """Starts the game by right clicking this cell, flags can be placed without exposing anything"""
+        self.start_game(3)
+
+class Minefield(engine.Board):
+    """Minefield is the pygame adapter of an `engine.Board`, rendering it and turning mouse events into moves
+
+    `Cell`s are only created on demand as views of a square (see `.cell()`)
+
+    Boards bigger than config's VIEWPORT are seen through a camera: `.board` is only the size of the view,
+    and only the squares in view are drawn, so rendering costs the same whatever the size of the board.
+    The camera is moved with `.pan()` and zoomed between config's ZOOM_CELLSIZES with `.zoom_at()`
     
     Attributes:
-        board (pg.Surface): The Surface that the `CellButton`s are rendered on
+        board (pg.Surface): The Surface that the cells in view are rendered on, at most VIEWPORT in size
         board_rect (pg.Rect)
-        board_abs_pos (int, int): The top-left of `.board` relative to the game display\
+        board_abs_pos (int, int): The top-left of `.board` relative to the game display
+        cellsize (int): The size of a square at the current zoom, with `.gap` pixels between squares
+        camera ([int, int]): The top-left of the view, in pixels of the whole board at the current zoom (0, 0 if it fits in the view)
+        origin (int, int): Where the top-left of the whole board is on `.board`, see `._update_view()`
+        view_dirty (bool): If the whole view has to be redrawn (the camera moved, or most squares changed)
+        cellstyle (UI.CellButtonStyle): Atlas of the images of every square state
+        state_overrides (dict[int, int]): Square index: `UI.CellButtonStyle` state replacing the one from the game state, eg. wrong flags
+        dirty_cells (set[int]): Indices of the squares that changed since the last render
+        pressed (int | None): Index of the square awaiting the release of the mouse button `.await_release`
+        hovered (int | None): Index of the square under the mouse
+        solver (solver.Solver | None): Created on the first `.hint()` of a game, then kept up to date with every change
+        probabilities (probability.ProbabilityEngine | None): Created with `.solver`, caches the frontier between hints
+        guess_hint (tuple[int, float] | None): (Index, mine probability) of the safest guess shown by the last `.hint()`
         is_suspended
-        mode
-        no_exposed
-        remaining_bombs
+        See `engine.Board` for the game state
     """
-    def __init__(self, pos_centre: tuple[int, int], cellstyle: UI.CellButtonStyle, mode=1):
-        """Creates the minefield filled with clickable `Cell`s"""
-        self.board = pg.Surface((CELLSIZE*COLS + GAP*(COLS-1), CELLSIZE*ROWS + GAP*(ROWS-1)))
+    debug = DEBUG
+    no_guess_budget = NO_GUESS_BUDGET
+    profiler = None     # profiler.FrameProfiler timing every click carried out, if set
+
+    # Square states, see `.square_state()`
+    START = 0       # All squares start by being a "start game" button
+    HIDDEN = 1
+    FLAGGED = 2
+    EXPOSED = 3
+
+    # (Square state, mouse button): unbound `Cell` action carried out by a click, shared by all squares
+    CLICK_ACTIONS = {
+        (START, 1): Cell.start_exposing,
+        (START, 3): Cell.start_flagging,
+        (HIDDEN, 1): Cell.expose,
+        (HIDDEN, 3): Cell.flag,
+        (FLAGGED, 3): Cell.flag,
+        (EXPOSED, 1): Cell.attempt_expose_around,
+    }
+
+    def __init__(self, pos_centre: tuple[int, int], cellstyle: UI.CellButtonStyle, mode=1, seed=None, *, preset=None, rows=None, cols=None, bombs=None):
+        """Creates the minefield, where every square starts as a "start game" button
+
+        The size is taken from `preset` ("beginner", "intermediate", "expert", see `engine.PRESETS`) and/or `rows`, `cols`, `bombs`,
+        falling back to config's ROWS, COLS, BOMBS for a custom board. Every game is generated from `seed` if given (see `engine.Board`)
+        """
+        self.state_overrides = {}
+        self.dirty_cells = set()
+        self.solver = None
+        self.probabilities = None
+        self.guess_hint = None
+        if preset is None and rows is None and cols is None and bombs is None:
+            rows, cols, bombs = ROWS, COLS, BOMBS
+        super().__init__(*engine.board_size(preset, rows, cols, bombs), mode, seed)
+        self.is_suspended = False
+        self.cellstyle = cellstyle
+        self.zoom_levels = sorted({*ZOOM_CELLSIZES, CELLSIZE})
+        self.cellsize, self.gap = CELLSIZE, GAP
+        self.atlas, self.atlas_areas = cellstyle.scaled(CELLSIZE)
+        self.camera = [0, 0]
+        self.origin = None
+        width, height = self.content_size()
+        self.board = pg.Surface((min(width, VIEWPORT[0]), min(height, VIEWPORT[1])))
         self.board_rect = self.board.get_rect(center=pos_centre)
         self.board_abs_pos = self.board_rect.topleft
-        self.is_suspended = False
-        self.mode = mode
-        matrix = [[None]*COLS for _ in range(ROWS)]
-        for row in range(ROWS): # Create a matrix with -1 value Cells
-            for col in range(COLS):
-                matrix[row][col] = Cell((row, col), -1, self, cellstyle)   # Initialises with -1 default value
-        super().__init__(matrix)
-        
-        self.no_exposed = 0
-        self.remaining_bombs = BOMBS
+        self._update_view()
+
+        self.pressed = None
+        self.await_release = None
+        self.hovered = None
+        listening_mouse_button.add(self)   # Mouse button events are routed to the squares through `._on_mouse_button()`
+
+    def cell(self, coord: tuple[int, int]) -> Cell:
+        """Returns a `Cell` view of the square at `coord` (row, col)"""
+        return Cell(coord, self)
+
+    def cells(self):
+        """Yields a `Cell` view of every square, row by row"""
+        for row in range(self.rows):
+            for col in range(self.cols):
+                yield Cell((row, col), self)
+
+    # engine.Board hooks
+    def on_game_start(self) -> None:
+        if self.no_guess_verified is False:
+            print(f"No no-guess board found in {self.no_guess_budget}s, this board may need guesses")
+        pg.event.post(pg.event.Event(GAMESTART))   # Sends a GAMESTART event to be handled in main.py
+
+    def on_game_end(self, won: bool, index: int) -> None:
+        unverified = " (not verified no-guess)" if self.no_guess_verified is False else ""
+        if won:
+            print("Win", self.board_id + unverified)
+        else:
+            print("Lose", divmod(index, self.cols), self.board_id + unverified)   # The board ID rebuilds this board for bug reports
+        pg.event.post(pg.event.Event(GAMEEND, {"won": won}))
+
+    def on_cells_changed(self, indices) -> None:
+        if len(indices) > self.rows*self.cols // 2:     # eg. a reset, the whole view is redrawn instead of tracking every square
+            self.view_dirty = True
+        else:
+            self.dirty_cells.update(indices)
+        if self.guess_hint is not None:
+            self.dirty_cells.add(self.guess_hint[0])
+            self.guess_hint = None
+        if self.solver is not None and self.is_started:
+            self.solver.update(indices)
     
     def reset_board(self):
-        self.no_exposed = 0
-        self.remaining_bombs = BOMBS
-        for cells in self:
-            for cell in cells:
-                cell.reset_cell()
-
-    def fill_matrix(self, start_coord: tuple[int, int], mode: int) -> None:
-        """Fills the game matrix with new values and mines"""
-        int_matrix = self.generate_int_matrix(start_coord, mode)
-        for row in range(ROWS):
-            for col in range(COLS):
-                val = int_matrix[row][col]
-                if val == -1:
-                    self[row][col].set_mine(True)
-                else:
-                    self[row][col].set_val(val)
-
-    def start_game(self, start_coord: tuple[int, int]) -> None:
-        """Change the state of cell button from a "start button" to their appropriate button + Posts a GAMESTART event"""
-        self.fill_matrix(start_coord, self.mode)
-        for row in self:
-            for cell in row:
-                cell.update_button()
-        pg.event.post(pg.event.Event(GAMESTART))   # Sends a GAMESTART event to be handled in main.py
+        """Clears the whole minefield back to "start game" buttons in one bulk operation"""
+        super().reset_board()
+        self.state_overrides.clear()
+        self.solver = None
+        self.probabilities = None
+        self.guess_hint = None
+        listening_mouse_button.add(self)
+        self.is_suspended = False
+        self.hover_at(pg.mouse.get_pos())
 
     def suspend(self) -> None:
         """Disable all Buttons"""
-        for row in self:
-            for cell in row:
-                cell.disable()
+        self.release()
+        self.hover_at(None)
+        listening_mouse_button.discard(self)
         self.is_suspended = True
     
     def resume(self) -> None:
         """Enable all Buttons"""
-        for row in self:
-            for cell in row:
-                cell.enable()
+        listening_mouse_button.add(self)
         self.is_suspended = False
+        self.hover_at(pg.mouse.get_pos())
+
+    def index_at(self, pos: tuple[int, int]) -> int | None:
+        """Returns the index of the square at the absolute (screen) position `pos`, or None if `pos` is not on one (eg. in a gap)"""
+        if not self.board_rect.collidepoint(pos):   # Squares out of view can't be clicked
+            return None
+        x = pos[0] - self.board_abs_pos[0] - self.origin[0]
+        y = pos[1] - self.board_abs_pos[1] - self.origin[1]
+        if x < 0 or y < 0:
+            return None
+        col, x_in_cell = divmod(x, self.cellsize+self.gap)
+        row, y_in_cell = divmod(y, self.cellsize+self.gap)
+        if row >= self.rows or col >= self.cols or x_in_cell >= self.cellsize or y_in_cell >= self.cellsize:
+            return None
+        return row*self.cols + col
+
+    def cell_at(self, pos: tuple[int, int]) -> Cell | None:
+        """Returns the Cell at the absolute (screen) position `pos`, or None if `pos` is not on a Cell (eg. in a gap)"""
+        index = self.index_at(pos)
+        return None if index is None else self.cell(divmod(index, self.cols))
+
+    def hover_at(self, pos: tuple[int, int] | None) -> None:
+        """Moves the hover state to the square at the absolute position `pos` (None to un-hover)
+
+        Only the previously hovered square and the newly hovered square are redrawn
+        """
+        index = None if pos is None or self.is_suspended else self.index_at(pos)
+        if index == self.hovered:
+            return
+        if self.hovered is not None:
+            self.dirty_cells.add(self.hovered)
+        if index is not None:
+            self.dirty_cells.add(index)
+        self.hovered = index
+
+    def release(self) -> None:
+        """Resets the pressed square back to idle, without triggering it"""
+        if self.pressed is not None:
+            self.dirty_cells.add(self.pressed)
+        self.pressed = None
+        self.await_release = None
+
+    def _on_mouse_button(self, event):
+        """Handles a MOUSEBUTTONDOWN/UP event on the square under the mouse
+
+        The previously pressed square is released if the event is not on it, like a `UI.Button` that the mouse left
+        """
+        index = self.index_at(event.pos)
+        if self.pressed is not None and self.pressed != index:
+            self.release()
+        if index is None:
+            return
+
+        if event.type == pg.MOUSEBUTTONDOWN:
+            self.pressed = index
+            self.await_release = event.button
+            self.dirty_cells.add(index)
+        elif event.type == pg.MOUSEBUTTONUP:
+            triggered = self.pressed == index and self.await_release == event.button    # Only if the mouse button has been held
+            self.release()
+            if triggered:
+                self.click(index, event.button)
+
+    def square_state(self, index: int) -> int:
+        """Returns the state (`.START`, `.HIDDEN`, `.FLAGGED`, `.EXPOSED`) of the square at `index` that clicks are dispatched on"""
+        if not self.is_started:
+            return self.START
+        if self.exposed[index]:
+            return self.EXPOSED
+        if self.flagged[index]:
+            return self.FLAGGED
+        return self.HIDDEN
+
+    def click(self, index: int, button: int) -> None:
+        """Carries out a click of mouse `button` on the square at `index`, looked up in `.CLICK_ACTIONS` from its current state"""
+        action = self.CLICK_ACTIONS.get((self.square_state(index), button))
+        if action is None:
+            return
+        if self.profiler is None:
+            action(self.cell(divmod(index, self.cols)))
+        else:
+            with self.profiler.span(action.__name__):   # eg. a slow first click or a large cascade
+                action(self.cell(divmod(index, self.cols)))
+
+    def hint(self) -> bool:
+        """Plays one batch of guaranteed moves from a `solver.Solver`: flags the deduced mines and exposes the deduced safe cells
+
+        Starts the game in the middle of the board if it hasn't started.
+        If nothing could be deduced, outlines the cell least likely to be a mine (see `.guess_hint`) instead.
+        Returns False if nothing could be deduced (a guess is needed) or the minefield is suspended
+        """
+        if self.is_suspended or self.is_over:
+            return False
+        if not self.is_started:
+            self.cell((self.rows//2, self.cols//2)).start_game(1)
+            return True
+        if self.solver is None:
+            import solver, probability  # Only loaded once hints are asked for, to start the game faster
+            self.solver = solver.Solver(self)
+            self.probabilities = probability.ProbabilityEngine(self.solver)
+        safe, mines = self.solver.deduce()
+        for index in mines:
+            if not self.flagged[index]:
+                self.flag_cell(index)
+        for index in safe:
+            if self.flagged[index]:     # A misplaced flag would stop the cell from being exposed
+                self.flag_cell(index)
+        if safe:
+            self.expose_cells([divmod(index, self.cols) for index in safe])
+        if not (safe or mines):
+            guess = self.probabilities.best_guess()
+            if guess is not None and guess[1] == 0 and self.probabilities.is_exact:     # Proven safe, eg. by the mines left
+                self.expose_cells([divmod(guess[0], self.cols)])
+                return True
+            self.guess_hint = guess
+            if self.guess_hint is not None:
+                self.dirty_cells.add(self.guess_hint[0])
+        return bool(safe or mines)
+
+    def _on_mouse_motion(self, event):
+        """Updates the hover state from a MOUSEMOTION event, dragging with the middle mouse button pans the camera"""
+        if event.buttons[1]:
+            self.pan(-event.rel[0], -event.rel[1])
+        self.hover_at(event.pos)
+
+    # Camera
+    def content_size(self) -> tuple[int, int]:
+        """Returns the size of the whole board at the current zoom"""
+        pitch = self.cellsize + self.gap
+        return pitch*self.cols - self.gap, pitch*self.rows - self.gap
+
+    def _update_view(self) -> None:
+        """Keeps the camera on the board and updates `.origin`, redrawing the whole view on the next render if it moved
+
+        Along an axis where the whole board fits in the view, it is centred instead
+        """
+        origin = []
+        for axis, (content, view) in enumerate(zip(self.content_size(), self.board.get_size())):
+            if content <= view:
+                self.camera[axis] = 0
+                origin.append((view - content) // 2)
+            else:
+                self.camera[axis] = min(max(self.camera[axis], 0), content - view)
+                origin.append(-self.camera[axis])
+        if tuple(origin) != self.origin:
+            self.origin = tuple(origin)
+            self.view_dirty = True
+
+    def pan(self, dx: int, dy: int) -> None:
+        """Moves the camera by (dx, dy) pixels, as far as the edges of the board"""
+        self.camera[0] += dx
+        self.camera[1] += dy
+        self._update_view()
+        self.hover_at(pg.mouse.get_pos())
+
+    def zoom_at(self, pos: tuple[int, int] | None, steps: int) -> None:
+        """Zooms in (`steps` > 0) or out by `steps` levels of ZOOM_CELLSIZES, keeping the point of the board at the absolute position `pos` in place
+
+        `pos` defaults to the centre of the view
+        """
+        level = self.zoom_levels.index(self.cellsize)
+        cellsize = self.zoom_levels[min(max(level + steps, 0), len(self.zoom_levels) - 1)]
+        if cellsize == self.cellsize:
+            return
+        if pos is None:
+            pos = self.board_rect.center
+        local = (pos[0] - self.board_abs_pos[0], pos[1] - self.board_abs_pos[1])
+        scale = (cellsize + round(GAP*cellsize/CELLSIZE)) / (self.cellsize + self.gap)
+        self.camera = [round((local[axis] - self.origin[axis]) * scale) - local[axis] for axis in (0, 1)]
+        self.cellsize, self.gap = cellsize, round(GAP*cellsize/CELLSIZE)
+        self.atlas, self.atlas_areas = self.cellstyle.scaled(cellsize)
+        self.view_dirty = True
+        self._update_view()
+        self.hover_at(pg.mouse.get_pos())
+
+    def visible_range(self) -> tuple[range, range]:
+        """Returns the (rows, cols) ranges of the squares in view"""
+        pitch = self.cellsize + self.gap
+        width, height = self.board.get_size()
+        rows = range(max(0, -self.origin[1] // pitch), min(self.rows, -((self.origin[1] - height) // pitch)))
+        cols = range(max(0, -self.origin[0] // pitch), min(self.cols, -((self.origin[0] - width) // pitch)))
+        return rows, cols
     
-    def check_win(self) -> bool:
-        """Winning condition"""
-        for row in self:
-            for cell in row:
-                if not cell.is_exposed and not cell.is_mine:
-                    return False
-        return True
-
-    @staticmethod
-    def generate_int_matrix(start_coord: tuple[int, int], mode: int) -> list[list[int]]:
-        """Generates random minefield - 2D Array of Cell object type
-
-            Args:
-                start_row: starting y-coordinate
-                start_col: starting x-coordinate
-                mode:
-                    0 - (Are you cheating?): Ensures 1st cell is always a "0"
-                    1 - (Standard): Ensures 1st cell is minimally an integer """
-
-        def generate_bombs(int_matrix: list[list[int]], blocked_rows: list, blocked_cols: list, mode: int) -> list[list[int]]:
-            """Determines number of bombs and assigns them to base matrix"""
-            bombs = BOMBS
-            for _ in range(bombs):
-                while True:
-                    randy = randint(0, ROWS-1)
-                    randx = randint(0, COLS-1)
-                    if mode == 1:
-                        # Ensures cell is some integer - Not a bomb
-                        if not int_matrix[randy][randx] == -1 and not (randy == blocked_rows[1] and randx == blocked_cols[1]):
-                            int_matrix[randy][randx] = -1
-                            break
-                    if mode == 0:
-                        # Ensures cell is a "0"
-                        if not int_matrix[randy][randx] == -1 and not (randy in blocked_rows and randx in blocked_cols):
-                            # Ensures cell is not already a bomb
-                            int_matrix[randy][randx] = -1
-                            break
-
-        def allocate_val(int_matrix) -> list[list[int]]:
-            """Allocates value of cell according to mines surrounding it using an extended field"""
-            extended = [[0]*(COLS+2)]
-            for row in range(ROWS):
-                extended.append([0] + int_matrix[row] + [0])
-            extended.append([0]*(COLS+2))
-
-            for y in range(1, ROWS+1):
-                for x in range(1, COLS+1):
-                    if extended[y][x] != -1:
-                        int_matrix[y-1][x-1] = count_mines(y, x, extended)
-
-        def count_mines(y: int, x: int, extended: list) -> int:
-            """Counts mines around a centre cell"""
-            count = 0
-            for a in range(-1, 2):
-                for b in range(-1, 2):
-                    if extended[y+a][x+b] == -1:
-                        count += 1
-            return count
-
-        int_matrix = [[0]*COLS for _ in range(ROWS)]
-        start_row, start_col = start_coord
-        generate_bombs(int_matrix, list(range(start_row-1,start_row+2)), list(range(start_col-1,start_col+2)), mode)    
-        allocate_val(int_matrix)
-        
-        return int_matrix
-    
+    def cell_state(self, index: int) -> int:
+        """Returns the `UI.CellButtonStyle` state of the square at `index` (0 to 8 for exposed numbers), based on the game state"""
+        if index in self.state_overrides:
+            return self.state_overrides[index]
+        if self.exposed[index]:
+            if self.mines[index]:
+                return UI.CellButtonStyle.MINE
+            return self.values[index]
+        if self.flagged[index]:
+            return UI.CellButtonStyle.FLAG
+        return UI.CellButtonStyle.NORMAL
+
+    def cell_rect(self, index: int) -> pg.Rect:
+        """Returns the rect of the square at `index`, relative to `.board` (it can be out of view)"""
+        row, col = divmod(index, self.cols)
+        pitch = self.cellsize + self.gap
+        return pg.Rect(self.origin[0] + pitch*col, self.origin[1] + pitch*row, self.cellsize, self.cellsize)
+
+    def draw_cell(self, index: int) -> pg.Rect:
+        """Blits the square at `index` onto `.board`, returning its rect"""
+        if index == self.hovered:
+            img_ind = UI.Button.PRESSED if index == self.pressed else UI.Button.HOVER
+        else:
+            img_ind = UI.Button.IDLE
+        rect = self.cell_rect(index)
+        self.board.blit(self.atlas, rect, self.atlas_areas[self.cell_state(index)][img_ind])
+        if self.guess_hint is not None and index == self.guess_hint[0]:
+            pg.draw.rect(self.board, COLOR_LIGHT2, rect, 2)
+        return rect
+
     def draw_board(self):
-        """Renders the Cell's Buttons onto the minefield's `.board`"""
-        self.board.fill(COLOR_DARK2)
-        for row in self:
-            for cell in row:
-                cell.draw()
+        """Renders every square in view onto the minefield's `.board`"""
+        self.board.fill(COLOR_DARK)     # Around the board, if it is zoomed out smaller than the view
+        self.board.fill(COLOR_DARK2, pg.Rect(self.origin, self.content_size()))
+        rows, cols = self.visible_range()
+        for row in rows:
+            for index in range(row*self.cols + cols.start, row*self.cols + cols.stop):
+                self.draw_cell(index)
+        self.dirty_cells.clear()
+        self.view_dirty = False
+
+    def draw_dirty(self) -> list[pg.Rect]:
+        """Renders only the squares that changed since the last render onto the minefield's `.board`
+
+        Returns:
+            List of the redrawn areas, relative to `.board`
+        """
+        rows, cols = self.visible_range()
+        if self.view_dirty or len(self.dirty_cells) * 2 > len(rows)*len(cols):  # Redrawing the whole view is cheaper than clearing each cell
+            self.draw_board()
+            return [self.board.get_rect()]
+        view = self.board.get_rect()
+        rects = []
+        for index in self.dirty_cells:
+            rect = self.cell_rect(index)
+            if not view.colliderect(rect):  # Out of view, drawn when the camera gets to it
+                continue
+            self.board.fill(COLOR_DARK2, rect)     # Clear behind the cell, in case its image has transparency
+            rects.append(self.draw_cell(index).clip(view))
+        self.dirty_cells.clear()
+        return rects
 
 class Game():
     pass
 
 # ================Debugging tools===============
 
-def print_field(minefield: list[list[Cell]]) -> None:
+def print_field(minefield: engine.Board) -> None:
     """Debugging - Prints field"""
-    for y in range(ROWS):
-        for x in range(COLS):
-            if minefield[y][x].is_exposed:
-                # "not" added in for debugging
-                if minefield[y][x].is_mine:
-                    print("*",end=" ")
-                else:
-                    print(minefield[y][x].val,end=" ")
-            else:
-                print("X",end=" ")            
-        print()
+    print(minefield)
@@ -0,0 +1,118 @@
+"""No-guess board generation (mode 2) - boards that the solver can clear from the first click without guessing
+
+Candidates are mode 0 boards (the first cell is a "0") from random seeds, checked with `solver.solve_game()` in a process pool.
+The first valid candidate wins, and if none is found within the latency budget, an unchecked mode 0 board is used instead.
+`prepare()` starts the search before the first click (eg. while the game-over pop-up is shown), so it is usually already done:
+
+    prepare(16, 30, 99, [(8, 15)])
+    seed, verified = find_seed(16, 30, 99, (8, 15))
+    board = engine.Board(16, 30, 99, 2, seed)   # Rebuilds the same no-guess board
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import engine
+import solver
+
+CHUNK = 4   # Candidates checked per task, so a task stays short and the first valid one is returned quickly
+PREPARED_CHUNKS = 4     # Tasks per worker started by `prepare()` for each likely first click
+
+_pool = None
+_workers = 1
+_prepared = {}  # (rows, cols, bombs, start_coord): futures of the candidate chunks started by `prepare()`
+
+
+def get_pool():
+    """Returns the shared worker pool, started on first use
+
+    Workers are forked, as spawning them would re-run the game's main script.
+    Without fork (eg. Windows), a thread pool is used, which still hides the search behind the frame but doesn't run it in parallel
+    """
+    global _pool, _workers
+    if _pool is None:
+        if "fork" in multiprocessing.get_all_start_methods():
+            _workers = os.cpu_count() or 1
+            _pool = ProcessPoolExecutor(_workers, mp_context=multiprocessing.get_context("fork"))
+        else:
+            _pool = ThreadPoolExecutor(1)
+    return _pool
+
+
+def is_no_guess(rows: int, cols: int, bombs: int, start_coord: tuple[int, int], seed: int) -> bool:
+    """If the mode 0 board from `seed` can be cleared from `start_coord` without guessing
+
+    The probabilities are only limited by component size, not time, so a seed gets the same answer on any machine
+    """
+    board = engine.Board(rows, cols, bombs, 0, seed)
+    return solver.solve_game(board, start_coord, allow_guess=False, time_budget=None)[0]
+
+
+def check_seeds(rows: int, cols: int, bombs: int, start_coord: tuple[int, int], seeds: list[int]) -> int | None:
+    """Returns the first of `seeds` giving a no-guess board, None if there is none (runs in the workers)"""
+    for seed in seeds:
+        if is_no_guess(rows, cols, bombs, start_coord, seed):
+            return seed
+    return None
+
+
+def submit_chunk(rows: int, cols: int, bombs: int, start_coord: tuple[int, int]):
+    return get_pool().submit(check_seeds, rows, cols, bombs, start_coord, [engine.new_seed() for _ in range(CHUNK)])
+
+
+def prepare(rows: int, cols: int, bombs: int, start_coords) -> None:
+    """Starts searching no-guess boards in the background for the likely first clicks `start_coords` of the next game
+
+    Searches for other board sizes are dropped
+    """
+    for key in [key for key in _prepared if key[:3] != (rows, cols, bombs)]:
+        for future in _prepared.pop(key):
+            future.cancel()
+    get_pool()
+    for start_coord in start_coords:
+        key = (rows, cols, bombs, tuple(start_coord))
+        if key not in _prepared:
+            _prepared[key] = [submit_chunk(rows, cols, bombs, start_coord) for _ in range(PREPARED_CHUNKS*_workers)]
+
+
+def find_seed(rows: int, cols: int, bombs: int, start_coord: tuple[int, int], seed=None, budget=1.0) -> tuple[int, bool]:
+    """Finds the seed of a mode 0 board that can be cleared from `start_coord` without guessing
+
+    Args:
+        seed: If given, the search is deterministic: `seed` is checked first, then the seeds that follow it in its
+            `SplitMix64` stream (a board ID's seed doesn't need a search, see `engine.Board.fill_matrix()`)
+        budget: Seconds before giving up on the search
+
+    Returns:
+        (seed, verified): verified is False if the budget ran out, the seed is then of an unchecked mode 0 board
+    """
+    deadline = time.perf_counter() + budget
+    if seed is not None:
+        rng = engine.SplitMix64(seed)
+        candidate = seed
+        while time.perf_counter() < deadline:
+            if is_no_guess(rows, cols, bombs, start_coord, candidate):
+                return candidate, True
+            candidate = rng.next()
+        return seed, False
+
+    # First valid candidate wins, with every worker kept busy until then
+    pending = set(_prepared.pop((rows, cols, bombs, tuple(start_coord)), ()))
+    for key in [key for key in _prepared if key[:3] == (rows, cols, bombs)]:
+        for future in _prepared.pop(key):   # Searches for the cells that weren't clicked would hold up this one
+            future.cancel()
+    get_pool()
+    try:
+        while True:
+            while len(pending) < 2*_workers:
+                pending.add(submit_chunk(rows, cols, bombs, start_coord))
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                return engine.new_seed(), False
+            done, pending = wait(pending, timeout, FIRST_COMPLETED)
+            for future in done:
+                if future.result() is not None:
+                    return future.result(), True
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,246 @@
+"""Mine probabilities of the unknown cells of an `engine.Board`, for when the `solver.Solver` can't prove any cell safe
+
+The frontier (unknown cells next to exposed numbers) is split into independent components, the mine configurations of each
+component are enumerated, and the components are combined with the number of mines left on the board:
+
+    solver = Solver(board)
+    solver.update(board.expose(start_coord))
+    safe, mines = solver.deduce()   # ... until nothing is deduced
+    index, probability = ProbabilityEngine(solver).best_guess()
+"""
+import time
+from math import comb, inf
+import solver as solver_module
+
+
+class BudgetExceeded(Exception):
+    """Raised when enumerating a component goes over the size or time budget"""
+
+
+class ProbabilityEngine():
+    """Computes the mine probability of every unexposed cell from a `solver.Solver`'s constraints
+
+    Component results are cached by their constraints, so they are only enumerated again when one of their cells changes.
+    Components over `max_component` cells, or that take longer than `time_budget` seconds in total, are approximated instead
+
+    Attributes:
+        solver (solver.Solver): Provides the constraints (run its `.deduce()` until it is stuck before asking for probabilities)
+        max_component (int): Components with more cells than this are approximated
+        time_budget (float | None): Seconds that enumerating all components of one `.probabilities()` call may take,
+            None for no time limit, so the results only depend on the board (eg. to verify no-guess boards)
+        is_exact (bool): If the last `.probabilities()` was exact (no component was approximated)
+    """
+    def __init__(self, solver: solver_module.Solver, max_component=120, time_budget=0.05):
+        self.solver = solver
+        self.max_component = max_component
+        self.time_budget = time_budget
+        self.cache = {}     # Component constraints (frozenset): (cells, {mines: (ways, mines per cell)}) or None if approximated
+        self.is_exact = True
+
+    def components(self) -> list[list[tuple[frozenset, int]]]:
+        """Splits the solver's constraints into groups that share no unknown cells"""
+        constraints, owners = self.solver.constraints, self.solver.owners
+        seen = set()
+        components = []
+        for start in constraints:
+            if start in seen:
+                continue
+            seen.add(start)
+            stack = [start]
+            component = []
+            while stack:
+                index = stack.pop()
+                unknown, mines = constraints[index]
+                component.append((unknown, mines))
+                for cell in unknown:
+                    for other in owners[cell]:
+                        if other not in seen:
+                            seen.add(other)
+                            stack.append(other)
+            components.append(component)
+        return components
+
+    def enumerate_component(self, component: list[tuple[frozenset, int]], deadline: float):
+        """Counts the mine configurations of a component, grouped by their number of mines
+
+        Cells are assigned in order, memoizing on the remaining mines of the partially assigned constraints,
+        so long chains of constraints are counted without listing every configuration
+
+        Returns:
+            (cells, {mines: (ways, [ways where cell i is a mine, for each cell i])})
+        """
+        cells = sorted({cell for unknown, _ in component for cell in unknown})
+        if len(cells) > self.max_component:
+            raise BudgetExceeded
+        position = {cell: i for i, cell in enumerate(cells)}
+        n = len(cells)
+        cell_constraints = [[] for _ in range(n)]
+        remaining, unassigned = [], []
+        first, last = [], []
+        for c, (unknown, mines) in enumerate(component):
+            positions = [position[cell] for cell in unknown]
+            for p in positions:
+                cell_constraints[p].append(c)
+            remaining.append(mines)
+            unassigned.append(len(positions))
+            first.append(min(positions))
+            last.append(max(positions))
+        # Constraints partially assigned when cell i is next: they decide what the rest of the cells can be
+        open_at = [[c for c in range(len(component)) if first[c] < i <= last[c]] for i in range(n + 1)]
+        memo = {}
+
+        def count(i: int) -> dict:
+            if i == n:
+                return {0: (1, [])}
+            key = (i, tuple(remaining[c] for c in open_at[i]))
+            if key in memo:
+                return memo[key]
+            if time.perf_counter() > deadline:
+                raise BudgetExceeded
+            result = {}
+            for value in (0, 1):
+                for c in cell_constraints[i]:
+                    remaining[c] -= value
+                    unassigned[c] -= 1
+                if all(0 <= remaining[c] <= unassigned[c] for c in cell_constraints[i]):
+                    for mines, (ways, counts) in count(i + 1).items():
+                        counts = [ways * value] + counts
+                        if mines + value in result:
+                            old_ways, old_counts = result[mines + value]
+                            result[mines + value] = (old_ways + ways, [a + b for a, b in zip(old_counts, counts)])
+                        else:
+                            result[mines + value] = (ways, counts)
+                for c in cell_constraints[i]:
+                    remaining[c] += value
+                    unassigned[c] += 1
+            memo[key] = result
+            return result
+
+        return cells, count(0)
+
+    def probabilities(self) -> dict[int, float]:
+        """Returns {index: probability of being a mine} for every unexposed cell of the board"""
+        solver = self.solver
+        board = solver.board
+        exposed = board.exposed
+        known_mines, known_safe = solver.known_mines, solver.known_safe
+        unknown = [index for index in range(board.rows*board.cols)
+                   if not exposed[index] and index not in known_mines and index not in known_safe]
+        frontier = set(solver.owners)
+        outside = [index for index in unknown if index not in frontier]
+        mines_left = board.bombs - len(known_mines)
+
+        # Enumerate every component, reusing the cached ones whose constraints did not change
+        deadline = inf if self.time_budget is None else time.perf_counter() + self.time_budget
+        cache = {}
+        exact, approximate = [], []
+        for component in self.components():
+            key = frozenset(component)
+            if key in self.cache:
+                result = self.cache[key]
+            else:
+                try:
+                    result = self.enumerate_component(component, deadline)
+                except BudgetExceeded:
+                    result = None
+            cache[key] = result
+            if result is None or not result[1]:     # Too big, or inconsistent (eg. the board is lost)
+                approximate.append(component)
+            else:
+                exact.append(result)
+        self.cache = cache  # Only the components still on the board are kept
+        self.is_exact = not approximate
+
+        probabilities = {index: 1.0 for index in known_mines if not exposed[index]}
+        probabilities.update((index, 0.0) for index in known_safe if not exposed[index])
+        if self.is_exact and self.combine(exact, len(outside), mines_left, outside, probabilities):
+            return probabilities
+
+        # Approximation: components are weighted independently of each other and of the number of mines left
+        self.is_exact = False
+        frontier_mines = 0.0
+        for cells, distribution in exact:
+            total = sum(ways for ways, _ in distribution.values())
+            for i, cell in enumerate(cells):
+                probabilities[cell] = sum(counts[i] for _, counts in distribution.values()) / total
+                frontier_mines += probabilities[cell]
+        for component in approximate:
+            for cell, probability in self.approximate_component(component).items():
+                probabilities[cell] = probability
+                frontier_mines += probability
+        if outside:
+            density = min(max((mines_left - frontier_mines) / len(outside), 0.0), 1.0)
+            probabilities.update((index, density) for index in outside)
+        return probabilities
+
+    @staticmethod
+    def combine(results: list, no_outside: int, mines_left: int, outside: list[int], probabilities: dict) -> bool:
+        """Weights every component's configurations by the ways the other components and the outside cells can hold the rest of the mines
+
+        Fills `probabilities` and returns True, or returns False if no configuration fits the number of mines left
+        """
+        # Number of ways of each total of mines over the frontier, and the same without each component (prefix * suffix)
+        polynomials = []
+        for _, distribution in results:
+            polynomial = [0] * (max(distribution) + 1)
+            for mines, (ways, _) in distribution.items():
+                polynomial[mines] = ways
+            polynomials.append(polynomial)
+
+        def multiply(a: list, b: list) -> list:
+            product = [0] * (len(a) + len(b) - 1)
+            for i, x in enumerate(a):
+                if x:
+                    for j, y in enumerate(b):
+                        product[i + j] += x * y
+            return product
+
+        prefix = [[1]]
+        for polynomial in polynomials:
+            prefix.append(multiply(prefix[-1], polynomial))
+        suffix = [[1]]
+        for polynomial in reversed(polynomials):
+            suffix.append(multiply(suffix[-1], polynomial))
+        suffix.reverse()
+
+        def outside_ways(mines: int) -> int:
+            return comb(no_outside, mines_left - mines) if 0 <= mines_left - mines <= no_outside else 0
+
+        total = sum(ways * outside_ways(mines) for mines, ways in enumerate(prefix[-1]))
+        if total == 0:
+            return False
+
+        for j, (cells, distribution) in enumerate(results):
+            others = multiply(prefix[j], suffix[j + 1])
+            weights = {mines: sum(ways * outside_ways(mines + other) for other, ways in enumerate(others))
+                       for mines in distribution}
+            for i, cell in enumerate(cells):
+                weight = sum(counts[i] * weights[mines] for mines, (_, counts) in distribution.items())
+                probabilities[cell] = weight / total
+        if no_outside:
+            # Each outside cell is a mine in comb(no_outside - 1, rest - 1) of the comb(no_outside, rest) ways
+            weight = sum(ways * comb(no_outside - 1, mines_left - mines - 1)
+                         for mines, ways in enumerate(prefix[-1]) if 1 <= mines_left - mines <= no_outside)
+            probabilities.update((index, weight / total) for index in outside)
+        return True
+
+    @staticmethod
+    def approximate_component(component: list[tuple[frozenset, int]]) -> dict[int, float]:
+        """Estimates each cell's probability as the average mine density of the constraints it is in"""
+        densities = {}
+        for unknown, mines in component:
+            density = min(max(mines / len(unknown), 0.0), 1.0)
+            for cell in unknown:
+                densities.setdefault(cell, []).append(density)
+        return {cell: sum(values) / len(values) for cell, values in densities.items()}
+
+    def best_guess(self, rng=None) -> tuple[int, float] | None:
+        """Returns (index, probability) of an unexposed cell least likely to be a mine (ties broken with `rng`), None if there is none"""
+        probabilities = self.probabilities()
+        candidates = {index: p for index, p in probabilities.items() if index not in self.solver.known_mines}
+        if not candidates:
+            return None
+        lowest = min(candidates.values())
+        safest = sorted(index for index, p in candidates.items() if p <= lowest + 1e-12)
+        index = safest[0] if rng is None else rng.choice(safest)
+        return index, candidates[index]
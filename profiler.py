@@ -0,0 +1,207 @@
+"""Frame profiler - times each phase of the game loop and the latency from a click to the frame showing it
+
+Enabled with the F3 key in the game, or from the start with the environment variable MINESWEEPER_PROFILE=1.
+The rolling p50/p95/p99 of every phase are drawn in an overlay, and F4 exports every recorded span to PROFILE_PATH in config.py,
+as CSV or as a Chrome trace (.json, open it in chrome://tracing or https://ui.perfetto.dev):
+
+    profiler = FrameProfiler()
+    while True:
+        ... handle events ...
+        profiler.lap("events")      # Time since the previous lap (or the start of the frame)
+        ... render ...
+        pg.display.update()
+        profiler.lap("update")
+        profiler.frame_shown()      # The clicks handled this frame are on screen
+        clock.tick(FPS)
+        profiler.lap("idle")
+        profiler.end_frame()
+"""
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+import pygame as pg
+from config import *
+import UI
+
+WINDOW = 300    # Frames (or clicks) the percentiles are computed over
+TRACE_LIMIT = 200_000   # Spans kept for the export, the oldest are dropped first
+OVERLAY_INTERVAL = 250  # Milliseconds between refreshes of the overlay
+LATENCY_TRACK = 100     # Track of the click latencies in the Chrome trace, as they overlap the phases
+
+
+def percentile(sorted_values: list, fraction: float):
+    """Returns the value at `fraction` (0 to 1) of the already sorted `sorted_values`"""
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+class FrameProfiler():
+    """Records how long each phase of every frame takes, as laps between `.lap()` calls
+
+    Attributes:
+        enabled (bool): Nothing is recorded while False, and `.lap()`/`.span()` cost next to nothing
+        samples (dict[str, deque[float]]): Phase name: its last `WINDOW` durations in milliseconds, "frame" and "click latency" included
+        spans (deque[tuple[str, int, int, int, int]]): (name, frame number, start ns, duration ns, track) of the last `TRACE_LIMIT` spans,
+            the track is 0 for the phases, 1 + the nesting depth for `.span()`s
+        frame (int): Number of the frame being recorded
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.samples = {}
+        self.spans = deque(maxlen=TRACE_LIMIT)
+        self.frame = 0
+        self.started = time.perf_counter_ns()   # Origin of the exported timestamps
+        self.frame_start = self.last_lap = self.started
+        self.pending_clicks = []    # perf_counter_ns() of the clicks handled this frame, waiting for the frame to be shown
+        self.depth = 0  # Spans open in `.span()`, nested spans are exported on their own track
+        self.overlay = None
+        self.overlay_rect = None
+        self.overlay_refreshed = 0
+
+    def toggle(self) -> None:
+        """Switches recording on or off, the recorded samples are kept"""
+        self.enabled = not self.enabled
+        self.frame_start = self.last_lap = time.perf_counter_ns()
+        self.pending_clicks.clear()
+
+    def _add(self, name: str, start: int, end: int, track=0) -> None:
+        self.samples.setdefault(name, deque(maxlen=WINDOW)).append((end - start) / 1e6)
+        self.spans.append((name, self.frame, start, end - start, track))
+
+    def lap(self, name: str) -> None:
+        """Records the time since the previous lap of this frame as phase `name`"""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        self._add(name, self.last_lap, now)
+        self.last_lap = now
+
+    @contextmanager
+    def span(self, name: str):
+        """Records the code run in this context as `name`, inside the current phase (eg. a click carried out while handling the events)"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            self._add(name, start, time.perf_counter_ns(), 1 + self.depth)
+
+    def click(self) -> None:
+        """Marks a click (eg. a MOUSEBUTTONUP) handled now, its latency is measured up to `.frame_shown()`"""
+        if self.enabled:
+            self.pending_clicks.append(time.perf_counter_ns())
+
+    def frame_shown(self) -> None:
+        """Called once the display has been updated, the clicks handled this frame have reached the screen"""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        for clicked in self.pending_clicks:
+            self._add("click latency", clicked, now, LATENCY_TRACK)
+        self.pending_clicks.clear()
+
+    def end_frame(self) -> None:
+        """Ends the frame (including the wait for the next one), the next lap starts the next frame"""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        self._add("frame", self.frame_start, now)
+        self.frame += 1
+        self.frame_start = self.last_lap = now
+
+    def stats(self) -> dict[str, tuple[float, float, float]]:
+        """Returns {phase: (p50, p95, p99)} in milliseconds over the last `WINDOW` samples"""
+        stats = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            stats[name] = (percentile(ordered, 0.5), percentile(ordered, 0.95), percentile(ordered, 0.99))
+        return stats
+
+    # Overlay
+    def draw_overlay(self, surface: pg.Surface, force=False) -> list[pg.Rect]:
+        """Draws the percentiles of every phase in the top-left corner of `surface`, refreshed every `OVERLAY_INTERVAL` ms
+
+        Returns:
+            The areas of `surface` that changed (the previous overlay is cleared with COLOR_DARK), for dirty rendering
+        """
+        if not self.enabled or not self.samples:
+            return []
+        now = pg.time.get_ticks()
+        if not force and self.overlay is not None and now - self.overlay_refreshed < OVERLAY_INTERVAL:
+            return []
+        self.overlay_refreshed = now
+        rows = [("ms", "p50", "p95", "p99")]
+        rows += [(name, *(f"{value:.2f}" for value in values)) for name, values in self.stats().items()]
+        size = 14
+        font = UI.default_font()
+        line_height = font.get_sized_height(size)
+        column_ends = (0, 115, 160, 205)    # The name is left aligned, the numbers right aligned to the end of their column
+        self.overlay = pg.Surface((column_ends[-1], line_height*len(rows)))
+        self.overlay.fill(COLOR_DARK)
+        for i, row in enumerate(rows):
+            name = row[0]
+            while font.get_rect(name, size=size).width > column_ends[1] - 50:   # Shortened to leave room for the p50
+                name = name[:-2] + "."
+            font.render_to(self.overlay, (0, i*line_height), name, COLOR_LIGHT, size=size)
+            for text, end in zip(row[1:], column_ends[1:]):
+                font.render_to(self.overlay, (end - font.get_rect(text, size=size).width, i*line_height), text, COLOR_LIGHT, size=size)
+        dirty = []
+        if self.overlay_rect is not None:
+            surface.fill(COLOR_DARK, self.overlay_rect)
+            dirty.append(self.overlay_rect)
+        self.overlay_rect = surface.blit(self.overlay, (5, 5))
+        dirty.append(self.overlay_rect)
+        return dirty
+
+    # Export
+    def export(self, path: str) -> None:
+        """Saves the recorded spans as a Chrome trace if `path` ends with .json, as CSV otherwise"""
+        if path.endswith(".json"):
+            self.export_chrome_trace(path)
+        else:
+            self.export_csv(path)
+
+    def export_csv(self, path: str) -> None:
+        """Saves a row (name, frame, start ms, duration ms) per span"""
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["name", "frame", "start_ms", "duration_ms"])
+            for name, frame, start, duration, _ in self.spans:
+                writer.writerow([name, frame, f"{(start - self.started)/1e6:.3f}", f"{duration/1e6:.3f}"])
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Saves the spans in the Chrome trace event format, the phases of a frame on one track and the spans inside them on the next"""
+        events = []
+        for name, frame, start, duration, track in self.spans:
+            events.append({"name": name, "ph": "X", "pid": 1, "tid": track,
+                           "ts": (start - self.started) / 1000, "dur": duration / 1000, "args": {"frame": frame}})
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+class StartupTimer():
+    """Times the phases of the game's start up to its first frame, as laps between `.mark()` calls
+
+    Attributes:
+        phases (list[tuple[str, float]]): (name, milliseconds) of every phase marked
+    """
+    def __init__(self, started: float):
+        """`started` is the `time.perf_counter()` the start was timed from, eg. taken before the imports"""
+        self.started = self.last_mark = started
+        self.phases = []
+
+    def mark(self, name: str) -> None:
+        """Records the time since the previous mark (or the start) as phase `name`"""
+        now = time.perf_counter()
+        self.phases.append((name, (now - self.last_mark) * 1000))
+        self.last_mark = now
+
+    def report(self) -> str:
+        """Returns the total time and the time of every phase on one line"""
+        phases = ", ".join(f"{name} {ms:.1f}" for name, ms in self.phases)
+        return f"Started in {(self.last_mark - self.started) * 1000:.1f} ms ({phases})"
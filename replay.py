@@ -0,0 +1,267 @@
+"""Game recordings - every game as its board ID and the timestamped moves made on it, to reproduce a game exactly
+
+A `Recorder` set as an `engine.Board`'s `.recorder` records every game played on it (the pygame `Minefield` included).
+Recordings are saved in a compact binary format (.msrl), and can be exported as JSON lines:
+
+    board.recorder = recorder = Recorder()
+    ...
+    save("games.msrl", recorder.games)
+
+Replaying headlessly runs the games back at full speed, eg. a regression corpus of recorded games:
+    python replay.py games.msrl
+    python replay.py games.msrl --jsonl games.jsonl
+
+In the game, set REPLAY_PATH in config.py to play a recording back at the speed it was played (see `Replayer`)
+"""
+import argparse
+import json
+import struct
+import sys
+import time
+import engine
+
+# Actions, as stored in the binary format
+EXPOSE = 1
+FLAG = 2
+CHORD = 3
+RESTART = 4
+ACTIONS = {"expose": EXPOSE, "flag": FLAG, "chord": CHORD, "restart": RESTART}
+ACTION_NAMES = {action: name for name, action in ACTIONS.items()}
+
+MAGIC = b"MSRL"
+VERSION = 1
+
+GAME_PAUSE = 1500   # Milliseconds the final state of a game played back by a `Replayer` is shown before the next game starts
+
+
+class GameLog():
+    """A recorded game
+
+    Attributes:
+        board_id (str): The board played, see `engine.make_board_id()`
+        events (list[tuple[int, int, int, int]]): (Milliseconds since the game started, action, row, col) of every move,
+            the last one is a `RESTART` if the game was restarted
+    """
+    def __init__(self, board_id: str, events=None):
+        self.board_id = board_id
+        self.events = [] if events is None else events
+
+    def __eq__(self, other):
+        return isinstance(other, GameLog) and (self.board_id, self.events) == (other.board_id, other.events)
+
+    def __repr__(self):
+        return f"GameLog({self.board_id!r}, {len(self.events)} events)"
+
+
+class Recorder():
+    """Records the games played on the boards it is set as the `.recorder` of (see `engine.Board`)
+
+    Attributes:
+        games (list[GameLog]): Every game started, in order
+    """
+    def __init__(self):
+        self.games = []
+        self.started = None     # `time.perf_counter()` at the start of the game being recorded, None if there is none
+
+    def record(self, board: engine.Board, action: str, index: int) -> None:
+        """Called by the board with every move it is asked to make ("start", "expose", "flag", "chord", "restart")"""
+        now = time.perf_counter()
+        if action == "start":
+            self.games.append(GameLog(board.board_id))
+            self.started = now
+            return
+        if self.started is None:    # Not in a game (eg. restarted, but not started again yet)
+            return
+        row, col = divmod(index, board.cols)
+        self.games[-1].events.append((round((now - self.started) * 1000), ACTIONS[action], row, col))
+        if action == "restart":
+            self.started = None
+
+
+# Binary format: MAGIC, VERSION, then for every game: the board ID, the number of events, then the events as
+# (milliseconds since the previous event, action, row, col), with every number as an unsigned LEB128 varint
+def _write_varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    """Returns the varint at `pos` and the position after it"""
+    n = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+def dumps(games: list[GameLog]) -> bytes:
+    """Encodes `games` in the binary format"""
+    out = bytearray(MAGIC)
+    out += struct.pack("<B", VERSION)
+    for game in games:
+        board_id = game.board_id.encode()
+        _write_varint(out, len(board_id))
+        out += board_id
+        _write_varint(out, len(game.events))
+        last = 0
+        for t, action, row, col in game.events:
+            _write_varint(out, t - last)
+            last = t
+            out.append(action)
+            _write_varint(out, row)
+            _write_varint(out, col)
+    return bytes(out)
+
+
+def loads(data: bytes) -> list[GameLog]:
+    """Decodes games encoded by `dumps()`"""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a game recording")
+    version, = struct.unpack_from("<B", data, len(MAGIC))
+    if version != VERSION:
+        raise ValueError(f"Unsupported game recording version {version}")
+    games = []
+    pos = len(MAGIC) + 1
+    try:
+        while pos < len(data):
+            length, pos = _read_varint(data, pos)
+            game = GameLog(data[pos:pos+length].decode())
+            pos += length
+            no_events, pos = _read_varint(data, pos)
+            t = 0
+            for _ in range(no_events):
+                delta, pos = _read_varint(data, pos)
+                t += delta
+                action = data[pos]
+                row, pos = _read_varint(data, pos + 1)
+                col, pos = _read_varint(data, pos)
+                game.events.append((t, action, row, col))
+            games.append(game)
+    except IndexError:
+        raise ValueError("Truncated game recording") from None
+    return games
+
+
+def save(path: str, games: list[GameLog]) -> None:
+    with open(path, "wb") as file:
+        file.write(dumps(games))
+
+
+def load(path: str) -> list[GameLog]:
+    with open(path, "rb") as file:
+        return loads(file.read())
+
+
+def export_jsonl(games: list[GameLog], file) -> None:
+    """Writes `games` to the text `file` as JSON lines: a {"board_id"} line per game, followed by its {"t", "action", "row", "col"} lines"""
+    for game in games:
+        file.write(json.dumps({"board_id": game.board_id}) + "\n")
+        for t, action, row, col in game.events:
+            file.write(json.dumps({"t": t, "action": ACTION_NAMES[action], "row": row, "col": col}) + "\n")
+
+
+def apply_event(board: engine.Board, action: int, row: int, col: int) -> None:
+    """Makes the recorded move on `board`"""
+    if action == EXPOSE:
+        board.expose((row, col))
+    elif action == FLAG:
+        board.flag((row, col))
+    elif action == CHORD:
+        board.chord((row, col))
+    elif action == RESTART:
+        board.reset_board()
+
+
+def replay_game(game: GameLog, board: engine.Board | None = None) -> engine.Board:
+    """Plays `game` back at full speed on `board` (a new `engine.Board` by default), returning the board
+
+    A `RESTART` at the end of the game is not replayed, so the board is left as the game ended
+    """
+    if board is None:
+        params = engine.parse_board_id(game.board_id)
+        board = engine.Board(params["rows"], params["cols"], params["bombs"], params["mode"])
+    elif board.is_started:
+        board.reset_board()
+    board.start_board_id(game.board_id)
+    for _, action, row, col in game.events:
+        if action != RESTART:
+            apply_event(board, action, row, col)
+    return board
+
+
+class Replayer():
+    """Plays games back on a board (eg. the game's `Minefield`) at the speed they were recorded, a `.tick()` per frame
+
+    Each game is started `pause` ms after the last move of the previous one, which is restarted with `restart()`
+    (defaults to the board's `.reset_board()`)
+    """
+    def __init__(self, board: engine.Board, games: list[GameLog], restart=None, pause=GAME_PAUSE):
+        self.board = board
+        self.restart = board.reset_board if restart is None else restart
+        self.games = list(games)
+        self.pause = pause
+        self.game = -1
+        self.event = 0
+        self.started = None     # Time (ms) the game being replayed started at
+        self.ended = None       # Time (ms) the last move of the game being replayed was made at, None until then
+        self.is_done = not self.games
+
+    def tick(self, now: int) -> None:
+        """Makes the moves that are due at `now` (milliseconds, eg. `pg.time.get_ticks()`)"""
+        if self.is_done:
+            return
+        if self.started is None or self.event >= len(self.games[self.game].events):
+            # Next game, once the previous one has been shown for `.pause` ms (without waiting for its restart)
+            if self.ended is not None and now - self.ended < self.pause:
+                return
+            self.game += 1
+            if self.game >= len(self.games):
+                self.is_done = True
+                return
+            if self.board.is_started:
+                self.restart()
+            self.board.start_board_id(self.games[self.game].board_id)
+            self.started, self.event, self.ended = now, 0, None
+        events = self.games[self.game].events
+        while self.event < len(events) and events[self.event][0] <= now - self.started:
+            _, action, row, col = events[self.event]
+            self.event += 1
+            if action != RESTART:
+                apply_event(self.board, action, row, col)
+        if self.event >= len(events):
+            self.ended = now
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="game recording (.msrl) to replay headlessly")
+    parser.add_argument("--jsonl", help="also export the recording as JSON lines to this file")
+    args = parser.parse_args(argv)
+
+    games = load(args.recording)
+    if args.jsonl:
+        with open(args.jsonl, "w") as file:
+            export_jsonl(games, file)
+
+    started = time.perf_counter()
+    won = lost = unfinished = 0
+    for game in games:
+        board = replay_game(game)
+        if not board.is_over:
+            unfinished += 1
+        elif board.won:
+            won += 1
+        else:
+            lost += 1
+    elapsed = time.perf_counter() - started
+    print(f"Replayed {len(games)} games in {elapsed:.2f}s: {won} won, {lost} lost, {unfinished} unfinished")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Self-play simulation - plays many headless games across worker processes, to tune the difficulty of board presets
+
+Every game is a seeded board (see `engine.Board`), played by a pluggable player from `PLAYERS` or "module:function".
+The workers stream each game's result back through a queue, and only running totals are kept, so memory stays flat:
+    python simulate.py --games 100000 --sizes 16x30 --densities 0.15,0.2 --modes 0,1
+    python simulate.py --games 1000 --player random --workers 4 --seed 42
+
+A player is called as `player(board, rng)` on a board that isn't started yet, plays until the game is over (or gives up),
+and returns the number of guesses it made. Every move it makes is counted as a click
+"""
+import argparse
+import importlib
+import multiprocessing
+import os
+import random
+import sys
+import time
+import engine
+import solver
+
+BATCH = 64  # Results sent through the queue at once, so the queue isn't a bottleneck on short games
+
+
+def play_solver(board: engine.Board, rng: random.Random) -> int:
+    """Starts in the middle and plays the solver's moves, guessing the safest cell when stuck (see `solver.solve_game()`)"""
+    return solver.solve_game(board, (board.rows//2, board.cols//2), rng)[1]
+
+
+def play_random(board: engine.Board, rng: random.Random) -> int:
+    """Exposes random unexposed cells until the game is over, every click after the first is a guess"""
+    board.start_game((board.rows//2, board.cols//2))
+    board.expose((board.rows//2, board.cols//2))
+    guesses = 0
+    while not board.is_over:
+        hidden = [index for index, exposed in enumerate(board.exposed) if not exposed]
+        board.expose(divmod(rng.choice(hidden), board.cols))
+        guesses += 1
+    return guesses
+
+
+PLAYERS = {"solver": play_solver, "random": play_random}
+
+
+def get_player(name: str):
+    """Returns the player `name` from `PLAYERS`, or the function of a "module:function" name"""
+    if name in PLAYERS:
+        return PLAYERS[name]
+    module, _, function = name.partition(":")
+    if not function:
+        raise ValueError(f"Unknown player {name!r}, expected one of {', '.join(PLAYERS)} or module:function")
+    return getattr(importlib.import_module(module), function)
+
+
+class ClickCounter():
+    """Counts the moves made on the boards it is set as the `.recorder` of (see `replay.Recorder`)"""
+    def __init__(self):
+        self.clicks = 0
+
+    def record(self, board: engine.Board, action: str, index: int) -> None:
+        if action not in ("start", "restart"):  # The first click is recorded again as an "expose"
+            self.clicks += 1
+
+
+def parse_configs(sizes: str, densities: str, modes: str) -> list[tuple[int, int, int, float, int]]:
+    """Returns every (rows, cols, bombs, density, mode) of the comma separated `sizes` (ROWSxCOLS), `densities` and `modes`
+
+    Bombs are clamped to at least 1 and at most what the mode leaves room for, ValueError is raised for boards too small for one
+    """
+    configs = []
+    for size in sizes.split(","):
+        rows, cols = map(int, size.lower().split("x"))
+        engine.board_size(None, rows, cols, 0)     # Fails on sizes under 1x1
+        for density in map(float, densities.split(",")):
+            for mode in map(int, modes.split(",")):
+                most = rows*cols - max(engine.blocked_sizes(rows, cols, mode))  # Bombs left room for by the first click
+                if most < 1:
+                    raise ValueError(f"A {rows}x{cols} board has no room for a bomb in mode {mode}, "
+                                     f"which frees up to {rows*cols - most} cells around the first click")
+                configs.append((rows, cols, min(max(round(rows*cols*density), 1), most), density, mode))
+    return configs
+
+
+def game_seed(seed: int, game: int) -> int:
+    """Returns the seed of the `game`th game, which doesn't depend on the number of workers"""
+    return engine.SplitMix64(seed + game).next()
+
+
+def worker(queue, configs: list, player_name: str, seed: int, games: range) -> None:
+    """Plays `games` (game i on config i % len(configs)), putting batches of results on `queue`, then None when done (or failed)
+
+    A result is (config index, won, clicks, 3BV, seconds, guesses), 3BV is None if the player never started the board
+    """
+    try:
+        play_games(queue, configs, player_name, seed, games)
+    finally:
+        queue.put(None)
+
+
+def play_games(queue, configs: list, player_name: str, seed: int, games: range) -> None:
+    player = get_player(player_name)
+    counter = ClickCounter()
+    boards = []
+    for rows, cols, bombs, _, mode in configs:
+        board = engine.Board(rows, cols, bombs, mode)
+        board.recorder = counter
+        boards.append(board)
+    batch = []
+    for game in games:
+        config = game % len(configs)
+        board = boards[config]
+        if board.is_started:
+            board.reset_board()
+        board.fixed_seed = game_seed(seed, game)
+        counter.clicks = 0
+        started = time.perf_counter()
+        guesses = player(board, random.Random(board.fixed_seed))
+        elapsed = time.perf_counter() - started
+        bbbv = board.metrics.bbbv if board.is_started else None   # A player can give up before the first click
+        batch.append((config, board.won, counter.clicks, bbbv, elapsed, guesses))
+        if len(batch) >= BATCH:
+            queue.put(batch)
+            batch = []
+    if batch:
+        queue.put(batch)
+
+
+class Aggregate():
+    """Running totals of the results of one config, the 3BV only of the games that were started"""
+    __slots__ = ("games", "started", "wins", "clicks", "bbbv", "seconds", "guesses")
+
+    def __init__(self):
+        self.games = self.started = self.wins = self.clicks = self.bbbv = self.guesses = 0
+        self.seconds = 0.0
+
+    def add(self, won: bool, clicks: int, bbbv: int | None, seconds: float, guesses: int) -> None:
+        self.games += 1
+        self.wins += won
+        self.clicks += clicks
+        if bbbv is not None:
+            self.started += 1
+            self.bbbv += bbbv
+        self.seconds += seconds
+        self.guesses += guesses
+
+
+def simulate(configs: list, games: int, player: str = "solver", workers: int | None = None, seed: int | None = None) -> list[Aggregate]:
+    """Plays `games` games spread over `configs` in `workers` processes (one per CPU by default), returning an `Aggregate` per config"""
+    get_player(player)  # Fails early on an unknown player
+    if seed is None:
+        seed = engine.new_seed()
+    workers = max(min(workers or os.cpu_count() or 1, games), 1)
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    queue = context.Queue(maxsize=4*workers)    # Workers wait if the results aren't read fast enough
+    processes = [context.Process(target=worker, args=(queue, configs, player, seed, range(i, games, workers)), daemon=True)
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    aggregates = [Aggregate() for _ in configs]
+    running = workers
+    while running:
+        batch = queue.get()
+        if batch is None:
+            running -= 1
+            continue
+        for config, *result in batch:
+            aggregates[config].add(*result)
+    for process in processes:
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"A simulation worker failed (exit code {process.exitcode}), see its traceback above")
+    return aggregates
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=1000, help="number of games, spread evenly over the configs")
+    parser.add_argument("--sizes", default="9x9,16x16,16x30", help="comma separated ROWSxCOLS")
+    parser.add_argument("--densities", default="0.12,0.16,0.2", help="comma separated mine densities")
+    parser.add_argument("--modes", default="1", help="comma separated generation modes (see config.py's GAMEMODE)")
+    parser.add_argument("--player", default="solver", help=f"{', '.join(PLAYERS)} or module:function")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, help="seed of the games, for a reproducible run")
+    args = parser.parse_args(argv)
+
+    try:
+        configs = parse_configs(args.sizes, args.densities, args.modes)
+    except ValueError as error:
+        parser.error(str(error))
+    started = time.perf_counter()
+    aggregates = simulate(configs, args.games, args.player, args.workers, args.seed)
+    elapsed = time.perf_counter() - started
+
+    print(f"{'size':>8} {'density':>7} {'mode':>4} {'games':>8} {'win %':>6} {'3BV':>7} {'clicks':>7} {'guesses':>7} {'ms/game':>8}")
+    for (rows, cols, _, density, mode), total in zip(configs, aggregates):
+        if total.games:
+            bbbv = f"{total.bbbv/total.started:>7.1f}" if total.started else f"{'-':>7}"
+            print(f"{f'{rows}x{cols}':>8} {density:>7g} {mode:>4} {total.games:>8} {total.wins/total.games:>6.1%} "
+                  f"{bbbv} {total.clicks/total.games:>7.1f} {total.guesses/total.games:>7.2f} "
+                  f"{total.seconds/total.games*1000:>8.2f}")
+    not_started = sum(total.games - total.started for total in aggregates)
+    if not_started:
+        print(f"{not_started} games were never started by the player, their 3BV is left out")
+    print(f"{args.games} games in {elapsed:.2f}s ({args.games/elapsed:.0f} games/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Save/load of games in progress, as a compact binary snapshot of an `engine.Board`
+
+The mines are rebuilt from the board ID, so only 2 bits per cell are stored (an exposed bitmap and a flagged bitmap),
+eg. about 250 KB for a 1000x1000 board. Loading fills the board's flat arrays in bulk, without a Python object per cell:
+
+    save("game.mssv", board, elapsed_ms)
+    elapsed_ms = load("game.mssv", board)  # board must be of the same size
+
+Format: MAGIC, version (u8), elapsed milliseconds (u64), length of the board ID (u16), the board ID,
+then the exposed and flagged bitmaps, each packed 8 cells per byte (first cell in the high bit) and padded to a whole byte
+"""
+import os
+import struct
+import tempfile
+import threading
+import engine
+
+MAGIC = b"MSSV"
+VERSION = 1
+HEADER = struct.Struct("<4sBQH")
+
+_UMASK = os.umask(0)    # Read once at import, as setting it back isn't thread safe (see `Autosaver`)
+os.umask(_UMASK)
+
+_TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+_FROM_DIGITS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def pack_bits(cells) -> bytes:
+    """Packs a bytes-like of 0/1 into 8 cells per byte
+
+    The cells are turned into a base 2 number in bulk, which is linear in CPython
+    """
+    digits = bytes(cells).translate(_TO_DIGITS) + b"0" * (-len(cells) % 8)
+    return int(digits, 2).to_bytes(len(digits) // 8, "big") if digits else b""
+
+
+def unpack_bits(data: bytes, no_cells: int) -> bytearray:
+    """Unpacks `no_cells` 0/1 cells packed by `pack_bits()`"""
+    digits = format(int.from_bytes(data, "big"), f"0{len(data) * 8}b").encode()
+    return bytearray(digits[:no_cells].translate(_FROM_DIGITS))
+
+
+def dumps(board: engine.Board, elapsed_ms=0) -> bytes:
+    """Returns the snapshot of the started `board`, with the game's `elapsed_ms`"""
+    return dump_state(board.board_id, board.exposed, board.flagged, elapsed_ms)
+
+
+def dump_state(board_id: str | None, exposed, flagged, elapsed_ms=0) -> bytes:
+    """Returns the snapshot of a board's state, from copies of it (see `Autosaver`)"""
+    if board_id is None:
+        raise ValueError("Only started games can be saved")
+    board_id = board_id.encode()
+    return HEADER.pack(MAGIC, VERSION, elapsed_ms, len(board_id)) + board_id + pack_bits(exposed) + pack_bits(flagged)
+
+
+def restore(board: engine.Board, data: bytes) -> int:
+    """Restores the snapshot `data` on `board`, returning the game's elapsed milliseconds
+
+    The board is reset and started from the board ID, then its exposed and flagged cells are replaced in bulk and the
+    counters rebuilt with `.recount()`.
+    The resumed game isn't recorded by the board's `.recorder`, as a recording is replayed from the first click and the moves
+    made before the snapshot aren't known. The next game started is recorded as usual
+    """
+    try:
+        magic, version, elapsed_ms, id_length = HEADER.unpack_from(data)
+    except struct.error:
+        raise ValueError("Truncated game snapshot") from None
+    if magic != MAGIC:
+        raise ValueError("Not a game snapshot")
+    if version != VERSION:
+        raise ValueError(f"Unsupported game snapshot version {version}")
+    pos = HEADER.size
+    board_id = data[pos:pos+id_length].decode()
+    pos += id_length
+    size = board.rows*board.cols
+    plane = (size + 7) // 8
+    if len(data) != pos + 2*plane:
+        raise ValueError(f"Game snapshot of {len(data)} bytes doesn't match a {board.rows}x{board.cols} board "
+                         f"({pos + 2*plane} bytes expected), it is of another size or not a version {VERSION} snapshot")
+
+    if board.is_started:
+        board.reset_board()     # Ends the game being recorded, if any
+    recorder, board.recorder = board.recorder, None     # A recording can't be replayed from the middle of a game
+    try:
+        board.start_board_id(board_id)
+    finally:
+        board.recorder = recorder
+    board.exposed[:] = unpack_bits(data[pos:pos+plane], size)
+    board.flagged[:] = unpack_bits(data[pos+plane:], size)
+    board.recount()
+    board.won = board.safe_remaining == 0
+    board.is_over = board.won or 1 in board.exposed_mines()
+    board.on_cells_changed(range(size))
+    return elapsed_ms
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Writes `data` to `path` through a temporary file, so `path` is never left half written
+
+    The file gets the permissions of a file made by `open()`, not the owner-only ones of the temporary file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(temp_path, 0o666 & ~_UMASK)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def save(path: str, board: engine.Board, elapsed_ms=0) -> None:
+    write_atomic(path, dumps(board, elapsed_ms))
+
+
+def load(path: str, board: engine.Board) -> int:
+    """Restores the snapshot at `path` on `board` (see `restore()`), returning the game's elapsed milliseconds"""
+    with open(path, "rb") as file:
+        return restore(board, file.read())
+
+
+class Autosaver(threading.Thread):
+    """Saves snapshots to `path` in a background thread, so packing and writing them doesn't hold up the frame
+
+    `.submit()` only copies the board's arrays, if snapshots are submitted faster than they are written, only the latest is written
+    """
+    DELETE = "delete"
+    CLOSE = "close"
+
+    def __init__(self, path: str):
+        super().__init__(daemon=True)
+        self.path = path
+        self.pending = None     # (board_id, exposed, flagged, elapsed_ms), `.DELETE` or `.CLOSE`, waiting to be carried out
+        self.condition = threading.Condition()
+        self.start()
+
+    def _queue(self, pending) -> None:
+        with self.condition:
+            if self.pending != self.CLOSE:
+                self.pending = pending
+            self.condition.notify()
+
+    def submit(self, board: engine.Board, elapsed_ms=0) -> None:
+        """Queues a snapshot of the started `board`"""
+        self._queue((board.board_id, bytes(board.exposed), bytes(board.flagged), elapsed_ms))
+
+    def delete(self) -> None:
+        """Queues the removal of the save, eg. once the game is over"""
+        self._queue(self.DELETE)
+
+    def close(self) -> None:
+        """Carries out what was queued before, then stops the thread"""
+        self.join_pending()
+        self._queue(self.CLOSE)
+        self.join()
+
+    def join_pending(self) -> None:
+        """Waits until what was queued has been carried out"""
+        with self.condition:
+            while self.pending is not None:
+                self.condition.wait()
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                pending = self.pending
+            if pending == self.CLOSE:
+                return
+            try:
+                if pending == self.DELETE:
+                    if os.path.exists(self.path):
+                        os.remove(self.path)
+                else:
+                    write_atomic(self.path, dump_state(*pending))
+            except OSError as error:    # Eg. a read-only directory or a full disk, the game goes on without the save
+                print(f"Could not autosave to {self.path}: {error}")
+            with self.condition:
+                if self.pending is pending:     # Not replaced while it was carried out
+                    self.pending = None
+                self.condition.notify_all()
@@ -0,0 +1,191 @@
+"""Constraint-propagation solver for an `engine.Board`, deducing guaranteed-safe cells and guaranteed mines
+
+Every exposed number is a constraint: the unknown cells around it hold exactly (value - known mines around it) mines.
+Constraints are only re-evaluated when a cell next to them changes, so solving a whole game stays cheap:
+
+    board = engine.Board.from_preset("expert")
+    won, guesses = solve_game(board, (8, 15))
+"""
+import random
+import engine
+
+
+class Solver():
+    """Deduces guaranteed-safe cells and guaranteed mines from a board's exposed values
+
+    Uses the single-cell rules first (no mines left -> all safe, as many mines as unknowns -> all mines),
+    then the linear (subset/overlap) rule between pairs of constraints that share unknown cells.
+
+    Flags are not trusted, as a player can misplace them, only the values of exposed cells are used
+
+    Attributes:
+        board (engine.Board): The board being solved
+        known_mines (set[int]): Indices of the deduced mines
+        known_safe (set[int]): Indices of the deduced safe cells, exposed or not
+        constraints (dict[int, tuple[frozenset[int], int]]): Exposed cell index: (its unknown neighbours, mines among them)
+    """
+    def __init__(self, board: engine.Board):
+        self.board = board
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets everything, for when the board is reset"""
+        self.known_mines = set()
+        self.known_safe = set()
+        self.constraints = {}
+        self.owners = {}        # Unknown cell index: set of the constraints it is in
+        self.dirty = set()      # Exposed cells whose constraint has to be re-evaluated
+        self.pending_safe = []  # Deduced safe cells not returned by `.deduce()` yet
+        self.pending_mines = []
+        if self.board.is_started:
+            self.update(range(self.board.rows*self.board.cols))
+
+    def update(self, indices) -> None:
+        """Informs the solver that the cells at `indices` changed (eg. were exposed), only their constraints are re-evaluated"""
+        board = self.board
+        exposed = board.exposed
+        for index in indices:
+            if exposed[index]:
+                self.known_safe.add(index)
+                self.dirty.add(index)
+            for neighbour in board.neighbour_indices(index):
+                if exposed[neighbour]:
+                    self.dirty.add(neighbour)
+
+    def add_mine(self, index: int) -> None:
+        if index in self.known_mines:
+            return
+        self.known_mines.add(index)
+        self.pending_mines.append(index)
+        self.dirty.update(self.owners.get(index, ()))
+
+    def add_safe(self, index: int) -> None:
+        if index in self.known_safe:
+            return
+        self.known_safe.add(index)
+        if not self.board.exposed[index]:
+            self.pending_safe.append(index)
+        self.dirty.update(self.owners.get(index, ()))
+
+    def refresh(self, index: int) -> tuple[frozenset, int] | None:
+        """Rebuilds the constraint of the exposed cell at `index`, returning None if it has no unknown neighbours left"""
+        board = self.board
+        exposed = board.exposed
+        known_mines, known_safe = self.known_mines, self.known_safe
+        old = self.constraints.pop(index, None)
+        if old is not None:
+            for cell in old[0]:
+                owners = self.owners[cell]
+                owners.discard(index)
+                if not owners:
+                    del self.owners[cell]
+        if board.mines[index]:      # An exposed mine (lost game) is not a constraint
+            return None
+
+        unknown = []
+        mines = board.values[index]
+        for neighbour in board.neighbour_indices(index):
+            if neighbour in known_mines:
+                mines -= 1
+            elif neighbour not in known_safe and not exposed[neighbour]:
+                unknown.append(neighbour)
+        if not unknown:
+            return None
+        constraint = (frozenset(unknown), mines)
+        self.constraints[index] = constraint
+        for cell in unknown:
+            self.owners.setdefault(cell, set()).add(index)
+        return constraint
+
+    def deduce(self) -> tuple[list[int], list[int]]:
+        """Runs the rules on the constraints that changed since the last call
+
+        Returns:
+            (safe, mines): Indices of the newly deduced safe cells (unexposed) and mines, as a batch
+        """
+        dirty = self.dirty
+        while dirty:
+            index = dirty.pop()
+            constraint = self.refresh(index)
+            if constraint is None:
+                continue
+            unknown, mines = constraint
+
+            # Single-cell rules
+            if mines == 0:
+                for cell in unknown:
+                    self.add_safe(cell)
+                continue
+            if mines == len(unknown):
+                for cell in unknown:
+                    self.add_mine(cell)
+                continue
+
+            # Linear rule with every constraint sharing a cell: mines(A-B) - mines(B-A) = mines(A) - mines(B)
+            # If that difference is |A-B|, all of A-B are mines and all of B-A are safe
+            others = set()
+            for cell in unknown:
+                others.update(self.owners[cell])
+            others.discard(index)
+            for other in others:
+                if other in dirty:  # Will be refreshed (and paired) anyway
+                    continue
+                other_unknown, other_mines = self.constraints[other]
+                for a, a_mines, b, b_mines in ((unknown, mines, other_unknown, other_mines),
+                                              (other_unknown, other_mines, unknown, mines)):
+                    only_a, only_b = a - b, b - a
+                    if (only_a or only_b) and a_mines - b_mines == len(only_a):    # eg. A inside B with as many mines: B-A is safe
+                        for cell in only_a:
+                            self.add_mine(cell)
+                        for cell in only_b:
+                            self.add_safe(cell)
+                        break
+                else:
+                    continue
+                dirty.add(index)    # This constraint changed, re-evaluate it again with its new unknowns
+                break
+
+        safe, mines = self.pending_safe, self.pending_mines
+        self.pending_safe, self.pending_mines = [], []
+        exposed = self.board.exposed
+        return [cell for cell in safe if not exposed[cell]], mines
+
+    def frontier(self) -> set[int]:
+        """Indices of the unknown cells next to an exposed number"""
+        return set(self.owners)
+
+
+def solve_game(board: engine.Board, start_coord: tuple[int, int], rng=None, allow_guess=True, time_budget=0.05) -> tuple[bool, int]:
+    """Plays a whole game on `board` (started at `start_coord` if not started yet), using only guaranteed moves when possible
+
+    When stuck, it exposes a cell the probabilities prove safe (see `probability.ProbabilityEngine`, eg. from the number of mines left),
+    else guesses the unknown cell least likely to be a mine (ties broken with `rng`), or stops if not `allow_guess`.
+    `time_budget` is the `ProbabilityEngine`'s, None for results that don't depend on the machine's speed
+
+    Returns:
+        (won, guesses): If the game was won, and the number of guesses needed
+    """
+    if rng is None:
+        rng = random
+    if not board.is_started:
+        board.start_game(start_coord)
+    import probability  # Imports this module
+    solver = Solver(board)
+    probabilities = probability.ProbabilityEngine(solver, time_budget=time_budget)
+    solver.update(board.expose(start_coord))
+    guesses = 0
+    while not board.is_over:
+        safe, mines = solver.deduce()
+        for index in mines:
+            if not board.flagged[index]:
+                board.flag_cell(index)
+        if safe:
+            solver.update(board.expose_cells(divmod(index, board.cols) for index in safe))
+            continue
+        index, mine_probability = probabilities.best_guess(rng)
+        if mine_probability > 0 or not probabilities.is_exact:
+            if not allow_guess:
+                break
+            guesses += 1
+        solver.update(board.expose(divmod(index, board.cols)))
+    return board.won, guesses
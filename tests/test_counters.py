@@ -0,0 +1,80 @@
+"""The maintained counters (exposed cells, bombs left, safe cells left) against a full recount after every move"""
+import random
+import pytest
+import engine
+
+
+def check(board: engine.Board) -> None:
+    board.check_counters()
+    if not board.is_started:
+        return
+    safe_hidden = sum(1 for index in range(board.rows*board.cols) if not board.mines[index] and not board.exposed[index])
+    assert board.safe_remaining == safe_hidden
+    assert board.check_win() == (safe_hidden == 0)
+    if board.is_over and not board.won:
+        assert any(board.mines[index] and board.exposed[index] for index in range(board.rows*board.cols))
+
+
+def play_randomly(board: engine.Board, rng: random.Random) -> None:
+    """Clicks, flags (right or wrong) and chords at random until the game is over, checking the counters after each move"""
+    size = board.rows*board.cols
+    while not board.is_over:
+        index = rng.randrange(size)
+        move = rng.random()
+        if move < 0.5:
+            if board.mines[index] and rng.random() < 0.98:  # Mostly safe clicks, so some games are won
+                index = rng.choice([i for i in range(size) if not board.mines[i] and not board.exposed[i]])
+            board.expose(divmod(index, board.cols))
+        elif move < 0.75:
+            if not board.mines[index] and rng.random() < 0.9:   # Mostly right flags, wrong ones lose some chords
+                index = rng.choice([i for i in range(size) if board.mines[i]])
+            board.flag(divmod(index, board.cols))
+        else:
+            numbers = [i for i in range(size) if board.exposed[i] and board.values[i] > 0]
+            board.chord(divmod(rng.choice(numbers) if numbers else index, board.cols))
+        check(board)
+    board.flag(divmod(rng.randrange(size), board.cols))  # Moves are ignored once the game is over
+    board.expose(divmod(rng.randrange(size), board.cols))
+    check(board)
+    board.reveal_mines()
+    check(board)
+
+
+@pytest.mark.parametrize("trial", range(60))
+def test_counters_after_every_move(trial):
+    rng = random.Random(trial)
+    rows, cols = rng.randint(2, 30), rng.randint(5, 30)
+    mode = rng.choice((0, 1, 2))
+    bombs = rng.randint(1, rows*cols - 9)
+    board = engine.Board(rows, cols, bombs, mode, rng.getrandbits(64))
+    board.no_guess_budget = 0.01
+    for _ in range(3):
+        check(board)
+        board.start_game((rng.randrange(rows), rng.randrange(cols)))
+        check(board)
+        play_randomly(board, rng)
+        board.reset_board()
+        assert (board.no_exposed, board.remaining_bombs, board.safe_remaining) == (0, bombs, rows*cols - bombs)
+
+
+def test_flags_before_the_first_click():
+    board = engine.Board(9, 9, 10, 1, 5)
+    board.flag((0, 0))
+    board.flag((8, 8))
+    board.flag((8, 8))
+    assert board.remaining_bombs == 9
+    board.start_game((4, 4))
+    check(board)
+
+
+def test_recount_after_loading_cells():
+    board = engine.Board(16, 16, 40, 0, 5)
+    board.start_game((8, 8))
+    board.expose((8, 8))
+    exposed, flagged = bytearray(board.exposed), bytearray(board.flagged)
+    flagged[0] = 1
+    board.reset_board()
+    board.start_game((8, 8))
+    board.exposed[:], board.flagged[:] = exposed, flagged
+    board.recount()
+    check(board)
@@ -0,0 +1,86 @@
+"""Minefield generation: the pure-Python and NumPy backends, bulk generation and prepared slots give the same boards"""
+import random
+import pytest
+import engine
+
+SIZES = [(1, 12, 3), (9, 9, 10), (16, 30, 99), (5, 7, 26)]
+STARTS = [(0, 0), (4, 6), (8, 29), (2, 3), (0, 11)]
+
+
+def cases():
+    """(rows, cols, bombs, start_coord, mode) of the starts of `STARTS` in each board, on its corners, edges and middle"""
+    for rows, cols, bombs in SIZES:
+        for start in STARTS:
+            if start[0] < rows and start[1] < cols:
+                for mode in (0, 1, 2):
+                    if bombs <= rows*cols - len(engine.blocked_indices(rows, cols, start, mode)):
+                        yield rows, cols, bombs, start, mode
+
+
+def check_matrix(int_matrix, rows, cols, bombs, start_coord, mode):
+    """The mines avoid the blocked cells and every value is the number of mines around it"""
+    assert len(int_matrix) == rows and all(len(row) == cols for row in int_matrix)
+    mines = {(row, col) for row in range(rows) for col in range(cols) if int_matrix[row][col] == -1}
+    assert len(mines) == bombs
+    assert not mines & {divmod(index, cols) for index in engine.blocked_indices(rows, cols, start_coord, mode)}
+    for row in range(rows):
+        for col in range(cols):
+            if (row, col) not in mines:
+                around = sum((row+a, col+b) in mines for a in (-1, 0, 1) for b in (-1, 0, 1))
+                assert int_matrix[row][col] == around
+
+
+@pytest.mark.parametrize("rows, cols, bombs, start_coord, mode", list(cases()))
+def test_python_backend(rows, cols, bombs, start_coord, mode):
+    for seed in range(5):
+        check_matrix(engine.generate_int_matrix(rows, cols, bombs, start_coord, mode, seed, "python"),
+                     rows, cols, bombs, start_coord, mode)
+
+
+@pytest.mark.parametrize("rows, cols, bombs, start_coord, mode", list(cases()))
+def test_numpy_backend_matches_python(rows, cols, bombs, start_coord, mode):
+    pytest.importorskip("numpy")
+    for seed in [0, 1, 2**64 - 1, 0xdeadbeef, 12345]:
+        assert (engine.generate_int_matrix(rows, cols, bombs, start_coord, mode, seed, "numpy")
+                == engine.generate_int_matrix(rows, cols, bombs, start_coord, mode, seed, "python"))
+
+
+@pytest.mark.parametrize("rows, cols, bombs, start_coord, mode", list(cases()))
+def test_bulk_generation_matches(rows, cols, bombs, start_coord, mode, monkeypatch):
+    rng = random.Random(f"{rows}x{cols}-{start_coord}-{mode}")
+    seeds = [0, 1, 2**64 - 1, 0xdeadbeef] + [rng.getrandbits(64) for _ in range(6)]
+    expected = [engine.generate_int_matrix(rows, cols, bombs, start_coord, mode, seed, "python") for seed in seeds]
+    if engine.np is not None:
+        batches = engine.generate_int_matrices(rows, cols, bombs, start_coord, mode, seeds, batch_size=4)
+        assert [matrix.tolist() for batch in batches for matrix in batch] == expected
+    monkeypatch.setattr(engine, "np", None)     # The pure-Python fallback
+    batches = engine.generate_int_matrices(rows, cols, bombs, start_coord, mode, seeds, batch_size=4)
+    assert [matrix for batch in batches for matrix in batch] == expected
+
+
+@pytest.mark.parametrize("rows, cols, bombs, start_coord, mode", list(cases()))
+def test_prepared_slots_match(rows, cols, bombs, start_coord, mode):
+    preparer = engine.BoardPreparer(rows, cols, bombs, mode, 4242)
+    preparer.run()
+    slots = preparer.slots[len(engine.blocked_indices(rows, cols, start_coord, mode))]
+    expected = engine.generate_int_matrix(rows, cols, bombs, start_coord, mode, 4242, "python")
+    assert engine.generate_int_matrix(rows, cols, bombs, start_coord, mode, None, "python", slots) == expected
+    if engine.np is not None:
+        assert engine.generate_int_matrix(rows, cols, bombs, start_coord, mode, None, "numpy", slots) == expected
+
+
+def test_remap_slots_skips_blocked_cells():
+    blocked = engine.blocked_indices(5, 5, (2, 2), 0)
+    allowed = engine.allowed_indices(5, 5, (2, 2), 0)
+    assert engine.remap_slots(range(len(allowed)), blocked) == allowed
+    if engine.np is not None:
+        assert engine.remap_slots(engine.np.arange(len(allowed)), blocked).tolist() == allowed
+
+
+def test_too_many_bombs():
+    with pytest.raises(ValueError):
+        engine.generate_int_matrix(3, 3, 1, (1, 1), 0, 1, "python")
+    with pytest.raises(ValueError):
+        next(engine.generate_int_matrices(3, 3, 9, (1, 1), 1, [1]))
+    with pytest.raises(ValueError):
+        engine.generate_int_matrix(3, 3, 1, (1, 1), 1, 1, "fortran")
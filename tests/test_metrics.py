@@ -0,0 +1,59 @@
+"""`engine.board_metrics()` against a brute-force flood fill"""
+import random
+from itertools import chain
+import pytest
+import engine
+
+
+def flood_metrics(values: list[int], rows: int, cols: int) -> tuple[int, int, list[int], int]:
+    """Returns (3BV, openings, sorted opening sizes, islands) with a cell by cell flood fill"""
+    def around(index):
+        row, col = divmod(index, cols)
+        return [r*cols + c for r in range(max(row-1, 0), min(row+2, rows)) for c in range(max(col-1, 0), min(col+2, cols))
+                if (r, c) != (row, col)]
+
+    def components(cells: set) -> list[set]:
+        groups, seen = [], set()
+        for start in cells:
+            if start in seen:
+                continue
+            seen.add(start)
+            group, stack = set(), [start]
+            while stack:
+                index = stack.pop()
+                group.add(index)
+                for neighbour in around(index):
+                    if neighbour in cells and neighbour not in seen:
+                        seen.add(neighbour)
+                        stack.append(neighbour)
+            groups.append(group)
+        return groups
+
+    zeros = {index for index, value in enumerate(values) if value == 0}
+    openings = components(zeros)
+    sizes = sorted(len(group | {n for index in group for n in around(index)}) for group in openings)
+    isolated = {index for index, value in enumerate(values)
+                if value > 0 and not any(values[n] == 0 for n in around(index))}
+    return len(openings) + len(isolated), len(openings), sizes, len(components(isolated))
+
+
+@pytest.mark.parametrize("seed", range(150))
+def test_matches_flood_fill(seed):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 30), rng.randint(1, 30)
+    if rows*cols < 10:
+        rows, cols = 4, 4
+    bombs = min(int(rows*cols * rng.choice((0.0, 0.05, 0.12, 0.2, 0.35))), rows*cols - 9)
+    mode = rng.choice((0, 1))
+    values = list(chain.from_iterable(engine.generate_int_matrix(rows, cols, bombs, (rows//2, cols//2), mode, seed)))
+
+    metrics = engine.board_metrics(values, rows, cols)   # A plain list, -1s included
+    assert (metrics.bbbv, metrics.openings, sorted(metrics.opening_sizes), metrics.islands) == flood_metrics(values, rows, cols)
+
+
+def test_board_metrics_property():
+    board = engine.Board(16, 30, 99, 0, seed=7)
+    board.start_game((8, 15))
+    assert board.metrics.bbbv == flood_metrics(list(board.values), 16, 30)[0]
+    board.reset_board()
+    assert board.metrics is None
@@ -0,0 +1,60 @@
+"""No-guess board search: deterministic checks of seeds, budgets, and boards the solver clears without guessing"""
+import pytest
+import engine
+import noguess
+import solver
+
+SIZE = (9, 9, 10)
+START = (4, 4)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_is_no_guess_is_deterministic(seed):
+    assert noguess.is_no_guess(*SIZE, START, seed) == noguess.is_no_guess(*SIZE, START, seed)
+
+
+def test_is_no_guess_finds_both_kinds_of_boards():
+    results = {noguess.is_no_guess(*SIZE, START, seed) for seed in range(50)}
+    assert results == {True, False}
+
+
+def test_find_seed_from_a_seed_is_deterministic():
+    first = noguess.find_seed(*SIZE, START, seed=12345, budget=30)
+    assert first[1]
+    assert noguess.find_seed(*SIZE, START, seed=12345, budget=30) == first
+
+
+def test_find_seed_with_no_budget_is_unverified():
+    assert noguess.find_seed(*SIZE, START, seed=12345, budget=0) == (12345, False)
+    seed, verified = noguess.find_seed(*SIZE, START, budget=0)
+    assert not verified
+    assert 0 <= seed < 2**64
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_verified_board_solves_without_guessing(seed):
+    found, verified = noguess.find_seed(*SIZE, START, seed=seed, budget=30)
+    assert verified
+    board = engine.Board(*SIZE, 2, seed)
+    board.start_game(START)
+    assert (board.seed, board.no_guess_verified) == (found, True)
+    assert solver.solve_game(board, START, allow_guess=False, time_budget=None) == (True, 0)
+
+
+def test_unverified_board_is_flagged():
+    board = engine.Board(*SIZE, 2, 12345)
+    board.no_guess_budget = 0
+    board.start_game(START)
+    assert (board.seed, board.no_guess_verified) == (12345, False)
+    board.reset_board()
+    assert board.no_guess_verified is None
+
+
+def test_board_id_seed_is_not_searched():
+    board = engine.Board(*SIZE, 2, 12345)
+    board.no_guess_budget = 0
+    board.start_game(START)
+    rebuilt = engine.Board.from_board_id(board.board_id)
+    assert rebuilt.seed == 12345
+    assert rebuilt.no_guess_verified is None
+    assert rebuilt.mines == board.mines
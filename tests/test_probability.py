@@ -0,0 +1,60 @@
+"""`probability.ProbabilityEngine` against enumerating every placement of the mines"""
+import random
+from itertools import combinations
+import pytest
+import engine
+import probability
+import solver
+
+
+def enumerated_probabilities(board: engine.Board) -> dict[int, float]:
+    """Returns {index: probability of being a mine} of every unexposed cell, from every placement fitting the exposed numbers"""
+    size = board.rows*board.cols
+    hidden = [index for index in range(size) if not board.exposed[index]]
+    numbers = [(index, board.values[index], [n for n in board.neighbour_indices(index) if not board.exposed[n]])
+               for index in range(size) if board.exposed[index]]
+    counts = dict.fromkeys(hidden, 0)
+    total = 0
+    for mines in combinations(hidden, board.bombs):
+        mines = set(mines)
+        if all(sum(n in mines for n in around) == value for _, value, around in numbers):
+            total += 1
+            for index in mines:
+                counts[index] += 1
+    return {index: count / total for index, count in counts.items()}
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_exact_probabilities_match_enumeration(seed):
+    rng = random.Random(seed)
+    rows, cols, bombs = rng.choice(((4, 5, 4), (5, 5, 5), (3, 7, 4), (4, 6, 6)))
+    board = engine.Board(rows, cols, bombs, 1, seed)
+    board.start_game((rng.randrange(rows), rng.randrange(cols)))
+    board_solver = solver.Solver(board)
+    prob_engine = probability.ProbabilityEngine(board_solver, time_budget=None)
+    board_solver.update(board.expose(board.start_coord))
+    while not board.is_over:    # Checked every time a guess is needed
+        safe, _ = board_solver.deduce()
+        if safe:
+            board_solver.update(board.expose_cells(divmod(index, cols) for index in safe))
+            continue
+        probabilities = prob_engine.probabilities()
+        assert prob_engine.is_exact
+        expected = enumerated_probabilities(board)
+        assert probabilities.keys() == expected.keys()
+        for index, p in expected.items():
+            assert probabilities[index] == pytest.approx(p, abs=1e-9), index
+        index, _ = prob_engine.best_guess(rng)
+        board_solver.update(board.expose(divmod(index, cols)))
+
+
+def test_guess_is_the_safest_cell():
+    board = engine.Board(5, 5, 5, 1, 3)
+    board.start_game((0, 0))
+    board_solver = solver.Solver(board)
+    board_solver.update(board.expose((0, 0)))
+    board_solver.deduce()
+    prob_engine = probability.ProbabilityEngine(board_solver)
+    index, p = prob_engine.best_guess()
+    candidates = {i: q for i, q in prob_engine.probabilities().items() if i not in board_solver.known_mines}
+    assert p == min(candidates.values()) and candidates[index] == p
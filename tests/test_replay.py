@@ -0,0 +1,60 @@
+"""Round trips of game recordings (.msrl) and replays of recorded games"""
+import random
+import pytest
+import engine
+import replay
+import solver
+
+
+def record_games(rows=9, cols=9, bombs=10, mode=0, games=5):
+    board = engine.Board(rows, cols, bombs, mode)
+    board.recorder = recorder = replay.Recorder()
+    for game in range(games):
+        if board.is_started:
+            board.reset_board()
+        solver.solve_game(board, (rows//2, cols//2), random.Random(game))
+        board.flag((0, 0))  # Ignored once the game is over, but still recorded
+    return board, recorder.games
+
+
+def test_dumps_loads_round_trip():
+    _, games = record_games()
+    assert len(games) == 5
+    assert replay.loads(replay.dumps(games)) == games
+
+
+def test_round_trip_of_large_numbers():
+    # Every number is a varint, these need several bytes each
+    games = [replay.GameLog("300x200-9000-m1-250,150-00000000deadbeef",
+                            [(0, replay.EXPOSE, 250, 150), (128, replay.FLAG, 299, 199), (10**9, replay.CHORD, 0, 128),
+                             (10**9, replay.RESTART, 0, 0)]),
+             replay.GameLog("9x9-10-m0-4,4-0000000000000001")]
+    assert replay.loads(replay.dumps(games)) == games
+
+
+def test_replay_game_reproduces_the_board():
+    board, games = record_games(games=1)
+    replayed = replay.replay_game(games[0])
+    assert replayed.board_id == board.board_id
+    assert (replayed.exposed, replayed.flagged, replayed.won) == (board.exposed, board.flagged, board.won)
+
+
+def test_replay_keeps_the_board_mode():
+    _, games = record_games(mode=0, games=1)
+    board = engine.Board(9, 9, 10, 1)
+    replay.replay_game(games[0], board)
+    assert board.mode == 1
+    assert board.board_id == games[0].board_id
+
+
+@pytest.mark.parametrize("data", [b"", b"XXXX\x01", b"MSRL\x02"])
+def test_loads_rejects_other_data(data):
+    with pytest.raises(ValueError):
+        replay.loads(data)
+
+
+def test_loads_rejects_truncated_recordings():
+    _, games = record_games(games=1)
+    data = replay.dumps(games)
+    with pytest.raises(ValueError):
+        replay.loads(data[:-1])
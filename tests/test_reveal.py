@@ -0,0 +1,88 @@
+"""Exposing cells: the BFS and the scanline fill of big openings against a cell by cell flood fill"""
+import random
+import pytest
+import engine
+
+
+def flood_fill(board: engine.Board, coords) -> set[int]:
+    """The cells `board.expose_cells(coords)` should expose, spreading one cell at a time from every unflagged "0" """
+    rows, cols = board.rows, board.cols
+    todo = [row*cols + col for row, col in coords]
+    reached = set()
+    while todo:
+        index = todo.pop()
+        if index in reached or board.exposed[index] or board.flagged[index]:
+            continue
+        reached.add(index)
+        if board.values[index] == 0:
+            row, col = divmod(index, cols)
+            todo.extend(r*cols + c for r in range(max(row-1, 0), min(row+2, rows))
+                                   for c in range(max(col-1, 0), min(col+2, cols)))
+    return reached
+
+
+def play(board: engine.Board, rng: random.Random, moves: int) -> None:
+    """Flags random cells and exposes random groups of cells, checking every move against `flood_fill()`"""
+    size = board.rows*board.cols
+    for _ in range(moves):
+        if board.is_over:
+            return
+        for _ in range(rng.randint(0, 6)):
+            board.flag_cell(rng.randrange(size))
+        coords = [divmod(rng.randrange(size), board.cols) for _ in range(rng.randint(1, 3))]
+        expected = flood_fill(board, coords)
+        exposed_before = board.exposed.count(1)
+        opened = board.expose_cells(coords)
+        assert len(opened) == len(set(opened))
+        assert set(opened) == expected
+        assert board.exposed.count(1) == exposed_before + len(opened)
+        board.check_counters()
+
+
+def random_board(rng: random.Random, rows: int, cols: int, density: float, mode=0) -> engine.Board:
+    bombs = min(int(rows*cols*density), rows*cols - 9)
+    board = engine.Board(rows, cols, bombs, mode, rng.getrandbits(64))
+    board.start_game((rng.randrange(rows), rng.randrange(cols)))
+    return board
+
+
+@pytest.mark.parametrize("trial", range(200))
+def test_small_openings(trial):
+    rng = random.Random(trial)
+    board = random_board(rng, rng.randint(3, 25), rng.randint(3, 25), rng.choice((0.02, 0.1, 0.2, 0.4)))
+    play(board, rng, 8)
+
+
+@pytest.mark.parametrize("fill_cells", [0, 8, 64])
+@pytest.mark.parametrize("trial", range(40))
+def test_scanline_fill(trial, fill_cells, monkeypatch):
+    # A low threshold hands every opening over to the scanline fill, flags included
+    monkeypatch.setattr(engine, "FILL_CELLS", fill_cells)
+    rng = random.Random(trial)
+    board = random_board(rng, rng.randint(10, 60), rng.randint(10, 60), rng.choice((0.0, 0.02, 0.05, 0.12)), rng.choice((0, 1)))
+    play(board, rng, 4)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_opening_bigger_than_fill_cells(seed):
+    rng = random.Random(seed)
+    board = random_board(rng, 120, 150, 0.01)
+    for _ in range(300):    # Flags inside the opening stop it, without splitting it
+        board.flag_cell(rng.randrange(120*150))
+    start = next(index for index in range(120*150) if board.values[index] == 0 and not board.flagged[index])
+    expected = flood_fill(board, [divmod(start, 150)])
+    assert len(expected) > engine.FILL_CELLS
+    opened = board.expose(divmod(start, 150))
+    assert len(opened) == len(set(opened)) and set(opened) == expected
+    board.check_counters()
+    play(board, rng, 4)
+
+
+def test_whole_board_opening():
+    board = engine.Board(100, 100, 1, 0, 7)
+    board.load_int_matrix([[0]*100 for _ in range(98)] + [[0]*98 + [1, 1], [0]*98 + [1, -1]])
+    board.mines[-1] = 1
+    opened = board.expose((50, 50))
+    assert sorted(opened) == list(range(100*100 - 1))
+    assert board.won
+    board.check_counters()
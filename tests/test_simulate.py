@@ -0,0 +1,45 @@
+"""Self-play configs and results, including players that give up before starting the board"""
+import pytest
+import simulate
+
+
+class ListQueue(list):
+    put = list.append
+
+
+def give_up(board, rng) -> int:
+    return 0
+
+
+def test_configs_clamp_bombs():
+    assert simulate.parse_configs("9x9", "0.001,0.99", "0,1") == [(9, 9, 1, 0.001, 0), (9, 9, 1, 0.001, 1),
+                                                                  (9, 9, 72, 0.99, 0), (9, 9, 80, 0.99, 1)]
+    assert simulate.parse_configs("1x4", "0.5", "0,1") == [(1, 4, 1, 0.5, 0), (1, 4, 2, 0.5, 1)]
+
+
+@pytest.mark.parametrize("size, mode", [("3x3", 0), ("3x3", 2), ("1x3", 0), ("1x1", 1), ("0x5", 1)])
+def test_configs_reject_boards_too_small(size, mode):
+    with pytest.raises(ValueError):
+        simulate.parse_configs(size, "0.2", str(mode))
+
+
+def test_games_never_started(monkeypatch):
+    monkeypatch.setitem(simulate.PLAYERS, "give_up", give_up)
+    queue = ListQueue()
+    configs = simulate.parse_configs("9x9", "0.12", "1")
+    simulate.play_games(queue, configs, "give_up", 1, range(3))
+    results = [result for batch in queue for result in batch]
+    assert [result[3] for result in results] == [None, None, None]
+    total = simulate.Aggregate()
+    for _, *result in results:
+        total.add(*result)
+    assert (total.games, total.started, total.wins, total.bbbv) == (3, 0, 0, 0)
+
+
+def test_games_played():
+    queue = ListQueue()
+    configs = simulate.parse_configs("9x9,16x16", "0.12", "0,1")
+    simulate.play_games(queue, configs, "solver", 7, range(8))
+    results = [result for batch in queue for result in batch]
+    assert [result[0] for result in results] == [0, 1, 2, 3, 0, 1, 2, 3]
+    assert all(result[3] > 0 and result[2] >= 1 for result in results)
@@ -0,0 +1,128 @@
+"""Round trips of saved games in progress (.mssv)"""
+import os
+import random
+import pytest
+import engine
+import replay
+import snapshot
+
+
+def play_some(board, moves=20, seed=0):
+    """Starts `board` in the middle, then flags the mines and exposes the safe cells of random cells"""
+    rng = random.Random(seed)
+    board.start_game((board.rows//2, board.cols//2))
+    board.expose((board.rows//2, board.cols//2))
+    for _ in range(moves):
+        index = rng.randrange(board.rows*board.cols)
+        if board.mines[index]:
+            board.flag_cell(index)
+        else:
+            board.expose(divmod(index, board.cols))
+
+
+@pytest.mark.parametrize("size", [0, 1, 7, 8, 9, 63, 64, 1000])
+def test_pack_bits_round_trip(size):
+    cells = bytes(random.Random(size).choice((0, 1)) for _ in range(size))
+    packed = snapshot.pack_bits(cells)
+    assert len(packed) == (size + 7) // 8
+    assert snapshot.unpack_bits(packed, size) == cells
+
+
+@pytest.mark.parametrize("rows, cols, bombs, mode", [(9, 9, 10, 0), (16, 30, 99, 1), (1, 40, 5, 1), (50, 50, 400, 0)])
+def test_dumps_restore_round_trip(rows, cols, bombs, mode):
+    board = engine.Board(rows, cols, bombs, mode)
+    play_some(board)
+    data = snapshot.dumps(board, 12345)
+
+    restored = engine.Board(rows, cols, bombs, mode)
+    assert snapshot.restore(restored, data) == 12345
+    assert restored.board_id == board.board_id
+    assert (restored.mines, restored.exposed, restored.flagged) == (board.mines, board.exposed, board.flagged)
+    assert (restored.no_exposed, restored.remaining_bombs, restored.safe_remaining) == (board.no_exposed, board.remaining_bombs, board.safe_remaining)
+    assert (restored.is_over, restored.won) == (board.is_over, board.won)
+
+
+def test_restore_of_an_unchecked_no_guess_board():
+    # A mode 2 game whose first click ran out of budget stores an unchecked seed, which must rebuild the same mines
+    board = engine.Board(16, 30, 99, 2, seed=42)
+    board.no_guess_budget = 0
+    play_some(board)
+    restored = engine.Board(16, 30, 99, 2)
+    snapshot.restore(restored, snapshot.dumps(board))
+    assert restored.mines == board.mines and restored.exposed == board.exposed
+
+
+def test_restore_keeps_the_board_mode():
+    board = engine.Board(9, 9, 10, 0)
+    play_some(board)
+    restored = engine.Board(9, 9, 10, 1)
+    snapshot.restore(restored, snapshot.dumps(board))
+    assert restored.mode == 1
+    assert restored.board_id == board.board_id
+
+
+def test_restore_rejects_other_data():
+    board = engine.Board(9, 9, 10, 0)
+    play_some(board)
+    data = snapshot.dumps(board)
+    for bad in (b"", b"XXXX" + data[4:], data[:-1], data + b"\x00"):
+        with pytest.raises(ValueError):
+            snapshot.restore(engine.Board(9, 9, 10, 0), bad)
+
+
+def test_restore_reports_a_size_mismatch():
+    board = engine.Board(9, 9, 10, 0)
+    play_some(board)
+    data = snapshot.dumps(board)
+    for bad, board in ((data[:-1], engine.Board(9, 9, 10, 0)), (data + b"\x00", engine.Board(9, 9, 10, 0)),
+                       (data, engine.Board(16, 16, 40, 0))):
+        with pytest.raises(ValueError, match="doesn't match a"):
+            snapshot.restore(board, bad)
+
+
+def test_resumed_games_are_not_recorded():
+    board = engine.Board(9, 9, 10, 0)
+    play_some(board)
+    data = snapshot.dumps(board)
+
+    board = engine.Board(9, 9, 10, 0)
+    board.recorder = recorder = replay.Recorder()
+    board.start_game((0, 0))
+    board.expose((0, 0))
+    snapshot.restore(board, data)   # The game being recorded ends with the restore
+    board.flag((0, 0))
+    assert len(recorder.games) == 1
+    assert [event[1] for event in recorder.games[0].events] == [replay.EXPOSE, replay.RESTART]
+    board.reset_board()
+    board.start_game((4, 4))
+    board.expose((4, 4))
+    assert len(recorder.games) == 2
+    assert [event[1] for event in recorder.games[1].events] == [replay.EXPOSE]
+
+
+def test_unstarted_boards_cant_be_saved():
+    with pytest.raises(ValueError):
+        snapshot.dumps(engine.Board(9, 9, 10, 0))
+
+
+def test_save_load(tmp_path):
+    board = engine.Board(9, 9, 10, 0)
+    play_some(board)
+    path = str(tmp_path / "game.mssv")
+    snapshot.save(path, board, 500)
+    restored = engine.Board(9, 9, 10, 0)
+    assert snapshot.load(path, restored) == 500
+    assert restored.exposed == board.exposed
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file permissions")
+@pytest.mark.parametrize("umask, mode", [(0o022, 0o644), (0o002, 0o664), (0o077, 0o600)])
+def test_saved_file_permissions(tmp_path, monkeypatch, umask, mode):
+    # Like a file made by open(), not the owner-only temporary file it is written through
+    monkeypatch.setattr(snapshot, "_UMASK", umask)
+    board = engine.Board(9, 9, 10, 0)
+    play_some(board)
+    path = tmp_path / "game.mssv"
+    snapshot.save(str(path), board)
+    assert path.stat().st_mode & 0o777 == mode
+    assert [file.name for file in tmp_path.iterdir()] == ["game.mssv"]
@@ -0,0 +1,109 @@
+"""Solver deductions on hand-built positions, and the incremental re-runs against solving the board from scratch"""
+import random
+import pytest
+import engine
+import solver
+
+
+def position(layout: list[str]) -> engine.Board:
+    """A started board from rows of "*" (mine), "." (hidden safe cell) and "#" (exposed safe cell, showing its number)"""
+    rows, cols = len(layout), len(layout[0])
+    is_mine = [[cell == "*" for cell in row] for row in layout]
+    int_matrix = [[-1 if is_mine[row][col] else
+                   sum(is_mine[r][c] for r in range(max(row-1, 0), min(row+2, rows)) for c in range(max(col-1, 0), min(col+2, cols)))
+                   for col in range(cols)] for row in range(rows)]
+    board = engine.Board(rows, cols, sum(map(sum, is_mine)), 1)
+    board.load_int_matrix(int_matrix)
+    for row, line in enumerate(layout):
+        for col, cell in enumerate(line):
+            board.exposed[row*cols + col] = cell == "#"
+    board.recount()
+    return board
+
+
+def solve(layout: list[str]) -> tuple[set[tuple[int, int]], set[tuple[int, int]]]:
+    """Returns the (safe, mines) coords deduced in `layout`"""
+    board = position(layout)
+    safe, mines = solver.Solver(board).deduce()
+    return {divmod(index, board.cols) for index in safe}, {divmod(index, board.cols) for index in mines}
+
+
+def test_nothing_exposed():
+    assert solve(["..*",
+                  "...",
+                  "*.."]) == (set(), set())
+
+
+def test_all_mines():
+    # The "1"s only have one unknown cell left
+    assert solve(["*#",
+                  "##"]) == (set(), {(0, 0)})
+
+
+def test_all_safe():
+    # The "1"s at (0, 1) and (1, 1) already have their mine at (0, 0), found by the "1" at (1, 0)
+    assert solve(["*#.",
+                  "##."]) == ({(0, 2), (1, 2)}, {(0, 0)})
+
+
+def test_no_mines_left():
+    # A "0" frees every cell around it
+    assert solve(["...",
+                  ".#.",
+                  "..."]) == ({(0, 0), (0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2)}, set())
+
+
+def test_one_two_one():
+    # No single cell rule applies: 2 mines in {a, b, c} and 1 in {a, b} puts one in c, then a by symmetry
+    assert solve(["*.*",
+                  "###"]) == ({(0, 1)}, {(0, 0), (0, 2)})
+
+
+def test_one_one_on_an_edge():
+    # 1 mine in {a, b} and 1 in {a, b, c, d}: c and d are safe, which isn't enough for a or b
+    assert solve(["*..",
+                  "##."]) == ({(0, 2), (1, 2)}, set())
+
+
+def test_subset_chain():
+    # A deduction makes other constraints dirty, which then deduce more (the "1-2-2-1" pattern)
+    assert solve([".**.",
+                  "####"]) == ({(0, 0), (0, 3)}, {(0, 1), (0, 2)})
+
+
+def test_flags_are_not_trusted():
+    board = position(["*..",
+                      "##."])
+    board.flag_cell(1)  # A wrong flag
+    safe, mines = solver.Solver(board).deduce()
+    assert (sorted(safe), mines) == ([2, 5], [])
+
+
+def test_deductions_are_correct_and_incremental_matches_full():
+    for seed in range(40):
+        rng = random.Random(seed)
+        board = engine.Board(16, 30, rng.choice((40, 70, 99)), 0, seed)
+        board.start_game((8, 15))
+        incremental = solver.Solver(board)
+        incremental.update(board.expose((8, 15)))
+        while not board.is_over:
+            safe, mines = incremental.deduce()
+            assert not any(board.mines[index] for index in safe)
+            assert all(board.mines[index] for index in mines)
+            for index in mines:
+                board.flag_cell(index)
+            if safe:
+                incremental.update(board.expose_cells(divmod(index, board.cols) for index in safe))
+                continue
+
+            # Stuck: a solver started on this position from scratch can't deduce more, or less
+            full = solver.Solver(board)
+            full_safe, full_mines = full.deduce()
+            assert full_safe == []
+            assert set(full_mines) == full.known_mines == incremental.known_mines
+            assert full.known_safe == incremental.known_safe
+            hidden = [index for index in range(board.rows*board.cols) if not board.exposed[index] and not board.mines[index]]
+            if not hidden:
+                break
+            incremental.update(board.expose(divmod(rng.choice(hidden), board.cols)))    # A lucky guess
+        assert board.won